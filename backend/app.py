@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .controllers.translation_text_controller import router as translation_router
@@ -9,12 +11,20 @@ from .controllers.translation_evaluation_controller import (
     router as translation_evaluation_router,
 )
 from .controllers.chat_bot_controller import router as chat_bot_router
-from .controllers.search_controller import search_router
+from .controllers.search_controller import search_router, refresh_facet_cache
 from .controllers.auth_controller import auth_controller
 from .controllers.file_controller import router as file_controller
+from .controllers.job_controller import router as job_router
+from .controllers.system_controller import router as system_router
 from .controllers.database import Base, engine
+from .controllers.migrations import run_migrations
+from .services.translate_client import get_translate_client
+from .services.pdf_to_pdf_service import shutdown_pdf_executor
+from .services.job_service import job_service
+from .services.registry import get_elasticsearch_service
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI()
 
@@ -25,8 +35,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paging and timing metadata for list endpoints
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "X-Search-Mode", "X-Search-Time-Ms", "X-Cache"],
 )
 
+@app.on_event("startup")
+async def start_job_workers():
+    await job_service.start()
+
+@app.on_event("startup")
+async def bootstrap_search_index():
+    try:
+        es = get_elasticsearch_service()
+        await asyncio.to_thread(es.bootstrap)
+        # Precompute the dashboard facets so the first page load does not wait on ES
+        await asyncio.to_thread(refresh_facet_cache, es)
+    except Exception as e:
+        # Not fatal: ingest_document retries the bootstrap on first use
+        print(f"Elasticsearch bootstrap failed: {e}")
+
+@app.on_event("shutdown")
+async def close_translate_client():
+    await job_service.stop()
+    await get_translate_client().aclose()
+    shutdown_pdf_executor()
+
 # Include the routers
 app.include_router(translation_router)
 app.include_router(document_router)
@@ -38,6 +71,8 @@ app.include_router(search_router)
 app.include_router(chat_bot_router)
 app.include_router(auth_controller)
 app.include_router(file_controller)
+app.include_router(job_router)
+app.include_router(system_router)
 
 # If you want to run the app with `uvicorn` or similar tools, use:
 # uvicorn app:app --reload
@@ -7,4 +7,98 @@ load_dotenv(dotenv_path)
 # load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GCP_API_KEY = os.getenv("GCP_API_KEY")
\ No newline at end of file
+GCP_API_KEY = os.getenv("GCP_API_KEY")
+
+# Google Translate HTTP client tuning
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "30"))
+TRANSLATE_CONNECT_TIMEOUT = float(os.getenv("TRANSLATE_CONNECT_TIMEOUT", "5"))
+TRANSLATE_MAX_CONNECTIONS = int(os.getenv("TRANSLATE_MAX_CONNECTIONS", "32"))
+TRANSLATE_MAX_KEEPALIVE = int(os.getenv("TRANSLATE_MAX_KEEPALIVE", "16"))
+TRANSLATE_MAX_PER_HOST = int(os.getenv("TRANSLATE_MAX_PER_HOST", "8"))
+TRANSLATE_MAX_RETRIES = int(os.getenv("TRANSLATE_MAX_RETRIES", "3"))
+TRANSLATE_BACKOFF_BASE = float(os.getenv("TRANSLATE_BACKOFF_BASE", "0.5"))
+TRANSLATE_BACKOFF_MAX = float(os.getenv("TRANSLATE_BACKOFF_MAX", "8"))
+
+# Translation memory (in-process LRU in front of a shared SQLite file)
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+TRANSLATION_MEMORY_PATH = os.getenv(
+    "TRANSLATION_MEMORY_PATH", os.path.join(os.getcwd(), "backend/misc", "translation_memory.sqlite3")
+)
+TRANSLATION_MEMORY_LRU_SIZE = int(os.getenv("TRANSLATION_MEMORY_LRU_SIZE", "10000"))
+
+# Long text translation: number of chunks translated at the same time
+TRANSLATE_CHUNK_CONCURRENCY = int(os.getenv("TRANSLATE_CHUNK_CONCURRENCY", "4"))
+
+# Language detection: local model first, remote googletrans only when unsure
+LANGUAGE_DETECTION_SAMPLE_CHARS = int(os.getenv("LANGUAGE_DETECTION_SAMPLE_CHARS", "2000"))
+LANGUAGE_DETECTION_MIN_CONFIDENCE = float(os.getenv("LANGUAGE_DETECTION_MIN_CONFIDENCE", "0.5"))
+LANGUAGE_DETECTION_CACHE_SIZE = int(os.getenv("LANGUAGE_DETECTION_CACHE_SIZE", "4096"))
+
+# Page-parallel PDF processing. The pool is per uvicorn worker, so the default
+# stays small: half the CPUs, at most 4
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+PDF_MIN_PAGES_PER_SHARD = int(os.getenv("PDF_MIN_PAGES_PER_SHARD", "8"))
+PDF_DOCX_PAGES_PER_BATCH = int(os.getenv("PDF_DOCX_PAGES_PER_BATCH", "25"))
+
+# Background jobs for document and video translation
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(os.getcwd(), "backend/misc", "jobs.sqlite3"))
+
+# Translated documents kept on disk for the content-addressed result cache
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(os.getcwd(), "backend/misc", "results"))
+# Least recently used artifacts are evicted past this size or age (0 disables the age limit)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+RESULT_CACHE_MAX_AGE_DAYS = float(os.getenv("RESULT_CACHE_MAX_AGE_DAYS", "30"))
+
+# Models and clients shared through the service registry
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_DIMS = int(os.getenv("EMBEDDING_DIMS", "384"))
+
+# Embeddings: batch size for encoding and a cache keyed by content hash and model name
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(os.getcwd(), "backend/misc", "embedding_cache.sqlite3")
+)
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "2048"))
+
+# Bulk upload: concurrent GCS uploads and sized Elasticsearch bulk requests
+BULK_UPLOAD_GCS_WORKERS = int(os.getenv("BULK_UPLOAD_GCS_WORKERS", "8"))
+ES_BULK_MAX_DOCS = int(os.getenv("ES_BULK_MAX_DOCS", "100"))
+ES_BULK_MAX_BYTES = int(os.getenv("ES_BULK_MAX_BYTES", str(20 * 1024 * 1024)))
+
+# Text extracted locally and indexed per document (the old attachment processor's default cap)
+INDEX_MAX_CHARS = int(os.getenv("INDEX_MAX_CHARS", "100000"))
+
+# Search: hybrid (BM25 + kNN) defaults
+SEARCH_DEFAULT_MODE = os.getenv("SEARCH_DEFAULT_MODE", "keyword")
+SEARCH_KNN_K = int(os.getenv("SEARCH_KNN_K", "10"))
+SEARCH_KNN_NUM_CANDIDATES = int(os.getenv("SEARCH_KNN_NUM_CANDIDATES", "50"))
+SEARCH_RRF_RANK_CONSTANT = int(os.getenv("SEARCH_RRF_RANK_CONSTANT", "60"))
+
+# Search paging: point-in-time + search_after cursors
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "5"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_PIT_KEEP_ALIVE = os.getenv("SEARCH_PIT_KEEP_ALIVE", "2m")
+SEARCH_HIGHLIGHT_FRAGMENTS = int(os.getenv("SEARCH_HIGHLIGHT_FRAGMENTS", "3"))
+
+# Passage indexing: overlapping windows of extracted text, each with its own vector
+PASSAGE_CHARS = int(os.getenv("PASSAGE_CHARS", "1000"))
+PASSAGE_OVERLAP = int(os.getenv("PASSAGE_OVERLAP", "200"))
+PASSAGE_MAX_COUNT = int(os.getenv("PASSAGE_MAX_COUNT", "200"))
+
+# Search result cache: TTL + LRU per worker, invalidated through a generation counter shared in SQLite
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "30"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_FACET_CACHE_TTL = float(os.getenv("SEARCH_FACET_CACHE_TTL", "600"))
+SEARCH_GENERATION_PATH = os.getenv(
+    "SEARCH_GENERATION_PATH", os.path.join(os.getcwd(), "backend/misc", "search_generation.sqlite3")
+)
+
+# File listings: keyset pagination on (uploaded_at, id)
+FILES_PAGE_SIZE = int(os.getenv("FILES_PAGE_SIZE", "50"))
+FILES_MAX_PAGE_SIZE = int(os.getenv("FILES_MAX_PAGE_SIZE", "500"))
+
+# File metadata export: rows fetched per server-side cursor batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
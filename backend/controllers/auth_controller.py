@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from .database import SessionLocal
+from .database import SessionLocal, AsyncSessionLocal
 from ..schemas.user import UserCreate, UserOut
 from ..services.user_service import create_user, authenticate_user, create_access_token, get_user_by_email, update
 from fastapi.security import OAuth2PasswordRequestForm
@@ -19,6 +19,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @auth_controller.post("/register", response_model=UserOut)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     return create_user(db, user)
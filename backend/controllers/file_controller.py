@@ -1,22 +1,64 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select, tuple_
+from datetime import datetime
+import csv
+import io
+import json
 from typing import List, Optional
 from fastapi import HTTPException
 from ..services.gcs_upload_service import GCSFileUploadService
+from ..services.registry import get_gcs_service
 from ..controllers.auth_controller import get_db
+from ..controllers.database import SessionLocal
 from ..schemas.file import FileOut
 from ..models.file import File
-from ..services.file_service import get_summary
+from ..services.file_service import get_summary, adjust_file_type_counts
+from ..services.search_cache_service import invalidate_search_cache
+from ..services.result_cache_service import discard_cached_results, remove_artifacts
+from ..services.pagination import encode_cursor, decode_cursor
+from ..config.config import FILES_PAGE_SIZE, FILES_MAX_PAGE_SIZE, EXPORT_BATCH_SIZE
 
 router = APIRouter()
-GCS = GCSFileUploadService()
+
+
+def keyset_page(q, response: Response, limit: int, cursor: Optional[str]):
+    """Return one page of `q`, newest first, continuing after `cursor`.
+
+    Pages are read with `WHERE (uploaded_at, id) < cursor ORDER BY uploaded_at
+    DESC, id DESC LIMIT n`, so every page costs the same index range scan no
+    matter how deep it is. The cursor for the next page goes in `X-Next-Cursor`.
+    """
+    if not 1 <= limit <= FILES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {FILES_MAX_PAGE_SIZE}")
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+            after = (datetime.fromisoformat(state["uploaded_at"]), int(state["id"]))
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        q = q.filter(tuple_(File.uploaded_at, File.id) < after)
+
+    # One extra row tells whether there is a next page without a COUNT(*)
+    rows = q.order_by(desc(File.uploaded_at), desc(File.id)).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            {"uploaded_at": last.uploaded_at.isoformat(), "id": last.id}
+        )
+    return rows
+
 
 @router.get("/recent_files", response_model=List[FileOut])
 def list_files(
+    response: Response,
     user_id: Optional[int]   = Query(None, description="Filter by user ID"),
     source:  Optional[str]   = Query(None, description="Filter by source: upload, generated, translated"),
     file_type: Optional[str] = Query(None, description="Filter by file type, e.g. pdf, docx, image"),
+    limit: int               = Query(FILES_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str]    = Query(None, description="X-Next-Cursor from the previous page"),
     db: Session              = Depends(get_db)
 ):
     q = db.query(File)
@@ -26,8 +68,7 @@ def list_files(
         q = q.filter(File.source == source)
     if file_type:
         q = q.filter(File.file_type == file_type)
-    q = q.order_by(desc(File.uploaded_at))
-    return q.all()
+    return keyset_page(q, response, limit, cursor)
 
 # Get number of files
 # image will contains .jpg, .jpeg, .png
@@ -45,21 +86,102 @@ def get_files_summary(db: Session = Depends(get_db)):
 
 # Get all documents
 @router.get("/")
-def get_all_documents(db: Session = Depends(get_db)):
-    documents = db.query(File).order_by(desc(File.uploaded_at))
-    return documents.all()
+def get_all_documents(
+    response: Response,
+    limit: int = FILES_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return keyset_page(db.query(File), response, limit, cursor)
+
+EXPORT_COLUMNS = [File.id, File.user_id, File.filename, File.file_type, File.file_path, File.source, File.uploaded_at]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_rows(filters: list, fmt: str):
+    """Yield the export body one batch at a time.
+
+    Plain column rows come from a server-side cursor (`yield_per`), so only
+    EXPORT_BATCH_SIZE rows are held at once and no ORM objects or pydantic
+    models are built. Uses its own session: the request's is closed before
+    the body is streamed.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(EXPORT_FIELDS)
+
+    db = SessionLocal()
+    try:
+        stmt = select(*EXPORT_COLUMNS).where(*filters).order_by(File.id)
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            for row in batch:
+                values = list(row)
+                values[-1] = row.uploaded_at.isoformat() if row.uploaded_at else None
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/files/export")
+def export_files(
+    format: str              = Query("ndjson", description="ndjson or csv"),
+    user_id: Optional[int]   = Query(None, description="Filter by user ID"),
+    source:  Optional[str]   = Query(None, description="Filter by source: upload, generated, translated"),
+    file_type: Optional[str] = Query(None, description="Filter by file type, e.g. pdf, docx, image"),
+    uploaded_from: Optional[datetime] = Query(None, description="Uploaded at or after this time"),
+    uploaded_to: Optional[datetime]   = Query(None, description="Uploaded before this time"),
+):
+    """Stream every matching file record, ordered by id, as NDJSON or CSV."""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(EXPORT_MEDIA_TYPES)}")
+    filters = []
+    if user_id is not None:
+        filters.append(File.user_id == user_id)
+    if source:
+        filters.append(File.source == source)
+    if file_type:
+        filters.append(File.file_type == file_type)
+    if uploaded_from is not None:
+        filters.append(File.uploaded_at >= uploaded_from)
+    if uploaded_to is not None:
+        filters.append(File.uploaded_at < uploaded_to)
+
+    return StreamingResponse(
+        export_rows(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="files.{format}"'},
+    )
 
 @router.delete("/files/{file_id}")
-def delete_file(file_id: int, db: Session = Depends(get_db)):
+def delete_file(
+    file_id: int,
+    db: Session = Depends(get_db),
+    gcs: GCSFileUploadService = Depends(get_gcs_service),
+):
     file = db.query(File).filter(File.id == file_id).first()
     
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    deleted_from_gcs = GCS.delete_gcs_file(file.file_path)
+    deleted_from_gcs = gcs.delete_gcs_file(file.file_path)
     if not deleted_from_gcs:
         raise HTTPException(status_code=500, detail="File not found in GCS or failed to delete")
 
     db.delete(file)
+    adjust_file_type_counts(db, {file.file_type: -1})
+    # A deleted translation must not be served from the result cache any more
+    artifacts = discard_cached_results(db, file.id)
     db.commit()
+    remove_artifacts(artifacts)
+    invalidate_search_cache()
     return {"message": f"File {file.filename} deleted from database and GCS"}
\ No newline at end of file
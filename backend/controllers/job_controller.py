@@ -0,0 +1,186 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse
+
+from .database import AsyncSessionLocal
+from .translation_pdf_to_doc_controller import (
+    MEDIA_TYPES,
+    pdf_to_docx_translator_service,
+    pdf_to_pdf_translator_service,
+    ingest_and_record,
+)
+from .translation_video_controller import video_translator_service
+from ..services.job_service import job_service, COMPLETED
+from ..services.result_cache_service import (
+    hash_file,
+    cache_key,
+    find_cached_result_async,
+    cached_file_url_async,
+    store_artifact,
+)
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+DOCX_MEDIA_TYPE = MEDIA_TYPES["docx"]
+
+
+async def run_document_job(params: dict, progress):
+    pdf_path = params["input_path"]
+    try:
+        return await translate_document(pdf_path, params, progress)
+    finally:
+        # The uploaded PDF is only needed while the job runs, whether it succeeds or fails
+        if os.path.exists(pdf_path):
+            os.unlink(pdf_path)
+
+
+async def translate_document(pdf_path: str, params: dict, progress):
+    dest_file = params["dest_file"]
+    media_type = MEDIA_TYPES.get(dest_file, "application/pdf")
+
+    content_hash = await asyncio.to_thread(hash_file, pdf_path)
+    key = cache_key(content_hash, params["src_language"], params["dest_language"], dest_file)
+    async with AsyncSessionLocal() as db:
+        cached = await find_cached_result_async(db, key)
+        if cached is not None:
+            return {
+                "local_path": cached.artifact_path,
+                "url": await cached_file_url_async(db, cached),
+                "media_type": media_type,
+                "filename": os.path.basename(cached.artifact_path),
+            }
+
+    if dest_file == "docx":
+        service = pdf_to_docx_translator_service
+    else:
+        service = pdf_to_pdf_translator_service
+    result = await service.process_file(
+        pdf_path, params["src_language"], params["dest_language"], progress, ingest=False
+    )
+
+    if "error" in result:
+        raise Exception("; ".join(result["error"]))
+
+    local_out = result["local_path"]
+    artifact_path = await asyncio.to_thread(store_artifact, local_out, key)
+    progress("ingest", 0, 2)
+    translated_url = await asyncio.to_thread(
+        ingest_and_record, service, pdf_path, dest_file, local_out, key, artifact_path, progress
+    )
+
+    return {
+        "local_path": artifact_path,
+        "url": translated_url,
+        "media_type": media_type,
+        "filename": os.path.basename(local_out),
+    }
+
+
+async def run_video_job(params: dict, progress):
+    warnings, doc_path = await video_translator_service.process_video_file(
+        params["input_path"], params["src_language"], params["dest_language"], progress
+    )
+    if warnings:
+        raise Exception("; ".join(warnings))
+
+    return {
+        "local_path": doc_path,
+        "url": None,
+        "media_type": DOCX_MEDIA_TYPE,
+        "filename": "translated_document.docx",
+    }
+
+
+job_service.register("document", run_document_job)
+job_service.register("video", run_video_job)
+
+
+async def save_upload(file: UploadFile, suffix: str) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, temp_file)
+        return temp_file.name
+
+
+def public_job(job: dict) -> dict:
+    """Job status without server-side paths."""
+    params = {key: value for key, value in job["params"].items() if key != "input_path"}
+    result = job["result"]
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "params": params,
+        "error": job["error"],
+        "result_ready": job["status"] == COMPLETED and result is not None,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@router.post("/translate/document", status_code=202)
+async def submit_document_job(
+    file: UploadFile,
+    src_language: str = Form(...),
+    dest_language: str = Form(...),
+    dest_file: str = Form(...),
+):
+    """Queue a PDF translation and return immediately with the job id."""
+    pdf_path = await save_upload(file, ".pdf")
+    job = await job_service.submit("document", {
+        "input_path": pdf_path,
+        "src_language": src_language,
+        "dest_language": dest_language,
+        "dest_file": dest_file,
+    })
+    return public_job(job)
+
+
+@router.post("/translate/video", status_code=202)
+async def submit_video_job(file: UploadFile = File(...), src_language: str = "en", dest_language: str = "vi"):
+    """Queue a video translation and return immediately with the job id."""
+    video_path = await save_upload(file, ".mp4")
+    job = await job_service.submit("video", {
+        "input_path": video_path,
+        "src_language": src_language,
+        "dest_language": dest_language,
+    })
+    return public_job(job)
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_job(job)
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    job = job_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return public_job(job)
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != COMPLETED or not job["result"]:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    result = job["result"]
+    if result["local_path"] and os.path.exists(result["local_path"]):
+        return FileResponse(result["local_path"], media_type=result["media_type"], filename=result["filename"])
+    if result["url"]:
+        # The cached artifact was evicted or deleted; fall back to the signed GCS URL
+        return RedirectResponse(result["url"])
+    raise HTTPException(status_code=410, detail="Job result is no longer available")
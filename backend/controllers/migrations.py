@@ -0,0 +1,57 @@
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..services.file_service import seed_file_type_counts
+
+
+def seed_summary_counters(engine: Engine):
+    with Session(engine) as db:
+        seed_file_type_counts(db)
+
+
+# Applied in order, once per database. `create_all` only creates missing
+# tables, so anything added to an existing table (indexes, columns) goes here.
+# Each step (a list of SQL statements, or a function taking the engine) must
+# be safe to re-run.
+MIGRATIONS = [
+    ("0001_files_listing_indexes", [
+        "CREATE INDEX {concurrently} IF NOT EXISTS ix_files_uploaded_at_id ON files (uploaded_at, id)",
+        "CREATE INDEX {concurrently} IF NOT EXISTS ix_files_user_id_uploaded_at ON files (user_id, uploaded_at)",
+        "CREATE INDEX {concurrently} IF NOT EXISTS ix_files_file_type_uploaded_at ON files (file_type, uploaded_at)",
+        "CREATE INDEX {concurrently} IF NOT EXISTS ix_files_source_uploaded_at ON files (source, uploaded_at)",
+    ]),
+    ("0002_seed_file_type_counts", seed_summary_counters),
+]
+
+
+def run_migrations(engine: Engine):
+    """Apply the migrations not yet recorded in `schema_migrations`."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (id VARCHAR PRIMARY KEY)"))
+        applied = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+    # On Postgres, build indexes without locking writes to the table; that cannot run inside a transaction
+    postgres = engine.dialect.name == "postgresql"
+    concurrently = "CONCURRENTLY" if postgres else ""
+
+    for migration_id, statements in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        if callable(statements):
+            statements(engine)
+        else:
+            with engine.connect() as conn:
+                if postgres:
+                    conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+                for statement in statements:
+                    conn.execute(text(statement.format(concurrently=concurrently)))
+                conn.commit()
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO schema_migrations (id) VALUES (:id)"), {"id": migration_id})
+        except IntegrityError:
+            # Another worker applied it at the same time
+            continue
+        print(f"Applied migration {migration_id}")
@@ -1,15 +1,18 @@
 from datetime import datetime, timedelta, timezone
+import asyncio
 import os
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..controllers.auth_controller import get_db
+from ..controllers.auth_controller import get_async_db
 from ..schemas.file import FileCreate
 from ..services.text_to_docx_service import TextToDocService
-from ..services.file_service import save_file_record
+from ..services.elasticsearch_service import ElasticSearchService
+from ..services.registry import get_elasticsearch_service
+from ..services.file_service import save_file_record_async
 
 router = APIRouter()
 text_to_doc_service = TextToDocService()
@@ -21,14 +24,16 @@ class TextRequest(BaseModel):
 @router.post("/save-text-to-doc")
 async def save_text_to_doc(
     request: TextRequest,
-    db: Session = Depends(get_db),   # ← inject the real DB session here
+    db: AsyncSession = Depends(get_async_db),
+    es: ElasticSearchService = Depends(get_elasticsearch_service),
 ):
     if not request.text:
         raise HTTPException(status_code=400, detail="No text provided")
 
-    local_path, gcs_url = text_to_doc_service.save_text_as_doc(request.text)
+    # Writing the docx, the GCS upload and indexing all block; keep them off the event loop
+    local_path, gcs_url = await asyncio.to_thread(text_to_doc_service.save_text_as_doc, request.text, es)
 
-    save_file_record(db, FileCreate(
+    await save_file_record_async(db, FileCreate(
         user_id   = 1,  # replace with current_user.id once auth is wired
         filename  = os.path.basename(local_path),
         file_type = "docx",
@@ -1,7 +1,34 @@
-from fastapi import APIRouter, File as FastAPIFile, UploadFile, HTTPException, Depends
-from ..services.elasticsearch_service import ElasticSearchService
+from fastapi import APIRouter, File as FastAPIFile, UploadFile, HTTPException, Depends, Header, Response
+from ..services.elasticsearch_service import (
+    ElasticSearchService,
+    CursorExpired,
+    normalize_file_type,
+    hit_highlights,
+    parse_facets,
+    FACET_AGGS,
+)
+from ..services.pagination import encode_cursor, decode_cursor, fingerprint
+from ..services.search_cache_service import search_cache, facet_cache, invalidate_search_cache
+from ..services.file_service import adjust_file_type_counts
+from ..services.registry import get_elasticsearch_service, get_gcs_service
+from ..config.config import (
+    BULK_UPLOAD_GCS_WORKERS,
+    SEARCH_DEFAULT_MODE,
+    SEARCH_KNN_K,
+    SEARCH_KNN_NUM_CANDIDATES,
+    SEARCH_PAGE_SIZE,
+    SEARCH_MAX_PAGE_SIZE,
+    SEARCH_HIGHLIGHT_FRAGMENTS,
+)
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import re
 import os
+import shutil
+import tempfile
+import time
+import zipfile
 from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
@@ -16,8 +43,6 @@ search_router = APIRouter(
     tags=["search"],
     responses={404: {"description": "Not found"}},
 )
-es = ElasticSearchService()
-
 # def setup_test_idx():
 #     es.reindex()
 
@@ -26,8 +51,14 @@ es = ElasticSearchService()
 
 EST = timezone(timedelta(hours=-5), name="EST")
 
+SEARCH_MODES = {"keyword", "hybrid"}
+
 @search_router.post("/upload")
-def upload(file: UploadFile = FastAPIFile(...), db: Session = Depends(get_db)):
+def upload(
+    file: UploadFile = FastAPIFile(...),
+    db: Session = Depends(get_db),
+    es: ElasticSearchService = Depends(get_elasticsearch_service),
+):
     try:
         contents = file.file.read()
         print(os.getcwd() + "/backend/misc/" + file.filename)
@@ -35,18 +66,7 @@ def upload(file: UploadFile = FastAPIFile(...), db: Session = Depends(get_db)):
             f.write(contents)
 
         file.file.close()
-        file_type = file.filename.split(".")[-1].lower()
-
-        if file_type == "pdf":
-            file_type = "pdf"
-        elif file_type == "docx":
-            file_type = "docx"
-        elif file_type == "xlsx":
-            file_type = "xlsx"
-        elif file_type in {"jpg", "jpeg", "png", "image", "img"}:
-            file_type = "image"
-        else:
-            file_type = "uncategorized"
+        file_type = normalize_file_type(file.filename)
         metadata = {
             "user_id": 1,
             "filename": file.filename,
@@ -58,6 +78,7 @@ def upload(file: UploadFile = FastAPIFile(...), db: Session = Depends(get_db)):
 
         new_file = File(**metadata)
         db.add(new_file)
+        adjust_file_type_counts(db, {file_type: 1})
         db.commit()
         db.refresh(new_file)
 
@@ -65,12 +86,16 @@ def upload(file: UploadFile = FastAPIFile(...), db: Session = Depends(get_db)):
         gcs_url = es.ingest_document(
             filename=file.filename,
             file_type=new_file.file_type,
-            sql_id=new_file.id
+            sql_id=new_file.id,
+            source=new_file.source,
+            user_id=new_file.user_id,
         )
+        es.refresh_index()
 
         # Update GCS URL in SQL
         new_file.file_path = gcs_url
         db.commit()
+        invalidate_search_cache()
 
         return FileOut.model_validate(new_file).model_dump()
 
@@ -78,18 +103,234 @@ def upload(file: UploadFile = FastAPIFile(...), db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-@search_router.post("/")
-def handle_search(query: str=None, file_type: str=None, db: Session = Depends(get_db)):
-    filters, parsed_query = extract_filters(query)
+def stage_uploads(files: List[UploadFile], staging_dir: str) -> List[str]:
+    """Write the uploaded files, or the members of a single zip archive, to `staging_dir`."""
+    paths = []
+    if len(files) == 1 and files[0].filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(files[0].file) as archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if member.is_dir() or not name or name.startswith("."):
+                    continue
+                path = unique_path(staging_dir, name)
+                with archive.open(member) as src, open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                paths.append(path)
+        return paths
+
+    for file in files:
+        path = unique_path(staging_dir, os.path.basename(file.filename))
+        with open(path, "wb") as dst:
+            shutil.copyfileobj(file.file, dst)
+        file.file.close()
+        paths.append(path)
+    return paths
+
+
+def unique_path(directory: str, name: str) -> str:
+    # Archives can hold the same file name in several folders
+    stem, ext = os.path.splitext(name)
+    path, n = os.path.join(directory, name), 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem}_{n}{ext}")
+        n += 1
+    return path
+
+
+def discard_uploads(db: Session, es: ElasticSearchService, records: List[dict], statuses: List[dict]):
+    """Delete the index documents, GCS objects and rows of files that did not make it, and take back their counts."""
+    if records:
+        # A batch can be indexed before a later one fails; its documents must not outlive their rows
+        try:
+            es.delete_documents([record["id"] for record in records])
+        except Exception as e:
+            print(f"Could not delete index documents of discarded uploads: {e}")
+    for status in statuses:
+        if status["file_path"]:
+            try:
+                get_gcs_service().delete_gcs_file(status["file_path"])
+            except Exception as e:
+                print(f"Could not delete GCS object {status['file_path']}: {e}")
+    if not records:
+        return
+    db.query(File).filter(File.id.in_([record["id"] for record in records])).delete(synchronize_session=False)
+    adjust_file_type_counts(db, {
+        file_type: -count for file_type, count in Counter(record["file_type"] for record in records).items()
+    })
+
+
+@search_router.post("/upload/bulk")
+def upload_bulk(
+    files: List[UploadFile] = FastAPIFile(...),
+    db: Session = Depends(get_db),
+    es: ElasticSearchService = Depends(get_elasticsearch_service),
+):
+    """Upload many files, or one zip archive, in a single request.
+
+    File rows are inserted in one transaction, GCS uploads run concurrently and
+    documents are indexed with `es.bulk`. Returns a status per file.
+    """
+    started = time.perf_counter()
+    staging_dir = tempfile.mkdtemp(dir=os.path.join(os.getcwd(), "backend/misc"))
+    try:
+        try:
+            paths = stage_uploads(files, staging_dir)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid zip archive")
+
+        # One transaction for all file rows and their counters
+        uploaded_at = datetime.now(EST)
+        rows = [
+            File(
+                user_id=1,
+                filename=os.path.basename(path),
+                file_type=normalize_file_type(path),
+                source="upload",
+                uploaded_at=uploaded_at,
+                file_path="",
+            )
+            for path in paths
+        ]
+        db.add_all(rows)
+        db.flush()
+        # Read everything needed before commit expires the rows
+        records = [{"id": row.id, "file_type": row.file_type, "filename": row.filename} for row in rows]
+        # The counters commit with the rows; discard_uploads takes both back
+        adjust_file_type_counts(db, Counter(record["file_type"] for record in records))
+        db.commit()
+
+        statuses = [
+            {"id": record["id"], "filename": record["filename"], "status": "ok", "file_path": None, "error": None}
+            for record in records
+        ]
+
+        try:
+            def upload_to_gcs(path, record):
+                return get_gcs_service().upload_file(path, f"{record['file_type']}/{os.path.basename(path)}")
+
+            with ThreadPoolExecutor(max_workers=BULK_UPLOAD_GCS_WORKERS) as pool:
+                futures = [pool.submit(upload_to_gcs, path, record) for path, record in zip(paths, records)]
+                for status, future in zip(statuses, futures):
+                    try:
+                        status["file_path"] = future.result()
+                    except Exception as e:
+                        status.update(status="failed", error=f"GCS upload failed: {e}")
+
+            uploaded = [i for i, status in enumerate(statuses) if status["status"] == "ok"]
+            try:
+                index_errors = es.bulk_ingest([
+                    {
+                        "file_path": paths[i],
+                        "file_type": records[i]["file_type"],
+                        "url": statuses[i]["file_path"],
+                        "sql_id": records[i]["id"],
+                        "source": "upload",
+                        "user_id": 1,
+                        "uploaded_at": uploaded_at.isoformat(),
+                    }
+                    for i in uploaded
+                ])
+            except Exception as e:
+                index_errors = [str(e)] * len(uploaded)
+            for i, error in zip(uploaded, index_errors):
+                if error:
+                    statuses[i].update(status="failed", error=f"Indexing failed: {error}")
+        except Exception as e:
+            for status in statuses:
+                if status["status"] == "ok":
+                    status.update(status="failed", error=f"Bulk upload failed: {e}")
+
+        # Keep rows only for files that are both stored and searchable
+        failed = [i for i, status in enumerate(statuses) if status["status"] != "ok"]
+        try:
+            db.bulk_update_mappings(File, [
+                {"id": status["id"], "file_path": status["file_path"]}
+                for status in statuses if status["status"] == "ok"
+            ])
+            discard_uploads(db, es, [records[i] for i in failed], [statuses[i] for i in failed])
+            db.commit()
+        except Exception:
+            # Do not leave rows behind without a file_path
+            db.rollback()
+            discard_uploads(db, es, records, statuses)
+            db.commit()
+            raise
+        finally:
+            invalidate_search_cache()
+        for status in statuses:
+            if status["status"] != "ok":
+                status["id"] = None
+
+        elapsed = time.perf_counter() - started
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        succeeded = sum(1 for status in statuses if status["status"] == "ok")
+        return {
+            "files": statuses,
+            "stats": {
+                "total": len(statuses),
+                "succeeded": succeeded,
+                "failed": len(statuses) - succeeded,
+                "bytes": total_bytes,
+                "seconds": round(elapsed, 3),
+                "files_per_second": round(len(statuses) / elapsed, 2) if elapsed else None,
+                "mb_per_second": round(total_bytes / elapsed / (1024 * 1024), 2) if elapsed else None,
+            },
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk upload failed: {str(e)}")
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+@search_router.get("/cache/stats")
+def search_cache_stats():
+    """Hit rate of the search result cache for this worker."""
+    return search_cache.stats()
+
+
+@search_router.get("/embedding-cache/stats")
+def embedding_cache_stats(es: ElasticSearchService = Depends(get_elasticsearch_service)):
+    """Hit/miss counters of the embedding cache for this worker."""
+    if es.embedding_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **es.embedding_cache.stats()}
+
+
+def build_query(query: str, file_type: str = None):
+    """Parse `query` into (query text, filters, bool clauses) shared by search and facets."""
+    filters, parsed_query = extract_filters(query or "")
     print(parsed_query)
-    from_ = 0 # for pagination
 
     if parsed_query:
         search_query = {
             "must": {
-                "multi_match": {
-                    "query": parsed_query,
-                    "fields": ["name", "attachment.content"]
+                "bool": {
+                    "should": [
+                        # Documents indexed before passages existed only have attachment.content
+                        {
+                            "multi_match": {
+                                "query": parsed_query,
+                                "fields": ["name", "attachment.content"]
+                            }
+                        },
+                        {
+                            "nested": {
+                                "path": "passages",
+                                "query": {"match": {"passages.text": parsed_query}},
+                                "score_mode": "max",
+                                "ignore_unmapped": True,
+                                "inner_hits": {
+                                    "size": SEARCH_HIGHLIGHT_FRAGMENTS,
+                                    "_source": False,
+                                    "highlight": {"fields": {"passages.text": {"number_of_fragments": 1}}},
+                                },
+                            }
+                        },
+                    ],
+                    "minimum_should_match": 1,
                 }
             }
         }
@@ -107,64 +348,199 @@ def handle_search(query: str=None, file_type: str=None, db: Session = Depends(ge
         else:
             filters["filter"] = [file_type_filter]
 
-    query_body = {"bool": {}}
-    if "must" in search_query:
-        query_body["bool"]["must"] = search_query["must"]
-    if "filter" in filters:
-        query_body["bool"]["filter"] = filters["filter"]
-
-    results = es.search(
-        query={"bool": {**search_query, **filters}},
-        # knn={
-        #     "field": "embedding",
-        #     "query_vector": es.get_embedding(parsed_query),
-        #     "k": 10,
-        #     "num_candidates": 50,
-        #     **filters,
-        # },
-        # rank={"rrf": {}},
-        # aggs={
-        #     "category-agg": {
-        #         "terms": {
-        #             "field": "category.keyword",
-        #         }
-        #     },
-        #     "year-agg": {
-        #         "date_histogram": {
-        #             "field": "updated_at",
-        #             "calendar_interval": "year",
-        #             "format": "yyyy",
-        #         },
-        #     },
-        # },
-        size=5,
-        from_=from_,
+    return parsed_query, filters, search_query
+
+
+@search_router.post("/")
+def handle_search(
+    response: Response,
+    query: str=None,
+    file_type: str=None,
+    mode: str = SEARCH_DEFAULT_MODE,
+    k: int = SEARCH_KNN_K,
+    num_candidates: int = SEARCH_KNN_NUM_CANDIDATES,
+    page_size: int = SEARCH_PAGE_SIZE,
+    cursor: str = None,
+    facets: bool = False,
+    cache_control: str = Header(None),
+    db: Session = Depends(get_db),
+    es: ElasticSearchService = Depends(get_elasticsearch_service),
+):
+    """Search indexed files.
+
+    `mode` is `keyword` (BM25 only) or `hybrid` (BM25 and kNN over the
+    document embeddings, fused with reciprocal rank fusion). `k` and
+    `num_candidates` tune the kNN side.
+
+    Results come back one page at a time. The total is in `X-Total-Count`;
+    when more results exist, pass the `X-Next-Cursor` header value back as
+    `cursor` with the same search parameters to get the next page.
+
+    With `facets=true` the response is `{"results": [...], "facets": {...}}`,
+    the facet counts (file_type, source, user_id, year) coming from the
+    same ES request as the first page's hits. Later pages return `facets: null`.
+
+    A `Cache-Control: no-cache` request header skips the result cache lookup.
+    """
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {sorted(SEARCH_MODES)}")
+    if k < 1 or num_candidates < 1:
+        raise HTTPException(status_code=400, detail="k and num_candidates must be positive")
+    if not 1 <= page_size <= SEARCH_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page_size must be between 1 and {SEARCH_MAX_PAGE_SIZE}")
+
+    started = time.perf_counter()
+    parsed_query, filters, search_query = build_query(query, file_type)
+
+    # Equivalent searches share cursors and cache entries: the query is compared after filter extraction
+    search_key = fingerprint(
+        " ".join(parsed_query.lower().split()), filters, mode, k, num_candidates, page_size
     )
-    # aggs = {
-    #     "Category": {
-    #         bucket["key"]: bucket["doc_count"]
-    #         for bucket in results["aggregations"]["category-agg"]["buckets"]
-    #     },
-    #     "Year": {
-    #         bucket["key_as_string"]: bucket["doc_count"]
-    #         for bucket in results["aggregations"]["year-agg"]["buckets"]
-    #         if bucket["doc_count"] > 0
-    #     },
-    #}
-
-    sql_ids = [hit["_source"]["sql_id"] for hit in results["hits"]["hits"] if "_source" in hit and "sql_id" in hit["_source"]]
+    state = {}
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if state.get("key") != search_key:
+            raise HTTPException(status_code=400, detail="Cursor does not belong to this search")
+
+    # Keyword pages after the first read from a point in time that belongs to one
+    # client, who closes it on the last page, so they are not cached
+    cacheable = "after" not in state
+    cache_key = fingerprint(search_key, cursor, facets)
+    generation = search_cache.generation()
+    no_cache = "no-cache" in (cache_control or "").lower()
+    cached = search_cache.get(cache_key, generation) if cacheable and not no_cache else None
+    if cached is not None:
+        body, headers, next_state = cached
+        response.headers.update(headers)
+        if next_state is not None:
+            response.headers["X-Next-Cursor"] = encode_cursor(next_state)
+        response.headers["X-Cache"] = "HIT"
+        response.headers["X-Search-Time-Ms"] = f"{(time.perf_counter() - started) * 1000:.1f}"
+        return body
+
+    highlight = {
+        "fields": {"name": {}, "attachment.content": {}},
+        "number_of_fragments": SEARCH_HIGHLIGHT_FRAGMENTS,
+    }
+    next_state = None
+    aggs = FACET_AGGS if facets and not cursor else None
+
+    if mode == "hybrid" and parsed_query:
+        # RRF scores cannot be used with search_after, so hybrid pages by offset into the fused list
+        offset = state.get("offset", 0)
+        fused, keyword_response = es.hybrid_search(
+            keyword_query={"bool": {**search_query, **filters}},
+            query_text=parsed_query,
+            filters=filters["filter"],
+            size=offset + page_size,
+            k=k,
+            num_candidates=num_candidates,
+            highlight=highlight,
+            aggs=aggs,
+        )
+        total = keyword_response["hits"]["total"]["value"]
+        aggregations = keyword_response.get("aggregations")
+        hits = fused[offset:offset + page_size]
+        if offset + page_size < max(len(fused), total):
+            next_state = {"key": search_key, "offset": offset + page_size}
+        total = max(len(fused), total)
+    else:
+        # Without query text there is nothing to embed, so hybrid falls back to keyword
+        pit_id = state.get("pit")
+        # The PIT is only opened once a client follows a cursor to the second page
+        opened = "after" in state and not pit_id
+        if opened:
+            pit_id = es.open_point_in_time()
+        try:
+            results = es.search_page(
+                query={"bool": {**search_query, **filters}},
+                pit_id=pit_id,
+                # One extra hit tells whether another page exists
+                size=page_size + 1,
+                search_after=state.get("after"),
+                track_total_hits=not cursor,
+                highlight=highlight,
+                aggs=aggs,
+            )
+        except CursorExpired:
+            raise HTTPException(status_code=410, detail="Cursor expired, start the search again")
+        except Exception:
+            if opened:
+                es.close_point_in_time(pit_id)
+            raise
+        hits = results["hits"]["hits"]
+        total = state["total"] if cursor else results["hits"]["total"]["value"]
+        aggregations = results.get("aggregations")
+        pit_id = results.get("pit_id", pit_id)
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            next_state = {"key": search_key, "after": hits[-1]["sort"], "total": total}
+            if pit_id:
+                next_state["pit"] = pit_id
+        elif pit_id:
+            es.close_point_in_time(pit_id)
+
+    # Hits are collapsed on sql_id; the first (best ranked) one wins
+    highlights = {}
+    for hit in hits:
+        sql_id = hit.get("_source", {}).get("sql_id")
+        if sql_id is not None and sql_id not in highlights:
+            highlights[sql_id] = hit_highlights(hit)
+    sql_ids = list(highlights)
 
     files = db.query(File).filter(File.id.in_(sql_ids)).all()
+    # Keep the ranking order of the hits
+    rank = {sql_id: position for position, sql_id in enumerate(sql_ids)}
+    files.sort(key=lambda file: rank[file.id])
+
+    headers = {"X-Total-Count": str(total), "X-Search-Mode": mode if parsed_query else "keyword"}
+    items = [
+        {**FileOut.model_validate(file).model_dump(mode="json"), "highlights": highlights[file.id]}
+        for file in files
+    ]
+    body = items
+    if facets:
+        body = {"results": items, "facets": parse_facets(aggregations) if aggregations else None}
+    if cacheable:
+        search_cache.put(cache_key, generation, (body, headers, next_state))
+
+    response.headers.update(headers)
+    if next_state is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_state)
+    response.headers["X-Cache"] = "MISS"
+    response.headers["X-Search-Time-Ms"] = f"{(time.perf_counter() - started) * 1000:.1f}"
+    return body
+
+
+def refresh_facet_cache(es: ElasticSearchService):
+    """Compute the unfiltered facet counts and keep them until the next write."""
+    generation = facet_cache.generation()
+    counts = es.facet_counts()
+    facet_cache.put("all", generation, counts)
+    return counts
+
 
-    # return {
-    #     "results": results["hits"]["hits"],
-    #     "query": query,
-    #     "from_": from_,
-    #     "total": results["hits"]["total"]["value"],
-    #     # "aggs": aggs,
-    # }
+@search_router.get("/facets")
+def search_facets(
+    query: str = None,
+    file_type: str = None,
+    es: ElasticSearchService = Depends(get_elasticsearch_service),
+):
+    """Facet counts for a search, or for every indexed file when no query is given.
 
-    return [FileOut.model_validate(file).model_dump() for file in files]
+    The unfiltered counts behind the dashboard are computed at startup and
+    served from cache until a file is added or removed.
+    """
+    parsed_query, filters, search_query = build_query(query, file_type)
+    if not parsed_query and not filters["filter"]:
+        cached = facet_cache.get("all", facet_cache.generation())
+        if cached is not None:
+            return cached
+        return refresh_facet_cache(es)
+    return es.facet_counts({"bool": {**search_query, **filters}})
 
 # async def retrieve_document(doc_id: str):
 #     document = es.retrieve_document(doc_id)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from ..services.registry import registry
+from .database import pool_status
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/registry")
+def registry_report():
+    """Which shared models and clients are loaded, with load time and memory per entry."""
+    return registry.report()
+
+@router.get("/db-pool")
+def db_pool_report():
+    """Connection pool usage of the sync and async database engines in this worker."""
+    return pool_status()
@@ -1,17 +1,26 @@
-from urllib.parse import urlparse
-from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, Request, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import asyncio
+import shutil
 import tempfile
 import os
 from ..services.pdf_to_docx_service import PdfToDocxTranslatorService
 from ..services.pdf_to_pdf_service import PdfToPdfTranslationService
-from ..controllers.auth_controller import get_db
+from .database import SessionLocal
 from ..schemas.file import FileCreate
 from ..services.file_service import save_file_record
-from fastapi.responses import StreamingResponse
-from google.cloud import storage
-import io
+from ..services.file_streaming import ranged_file_response
+from ..services.result_cache_service import (
+    hash_file,
+    cache_key,
+    find_cached_result_async,
+    cached_file_url_async,
+    store_artifact,
+    restore_artifact,
+    save_cached_result,
+)
+from ..controllers.auth_controller import get_async_db
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -20,35 +29,13 @@ router = APIRouter()
 pdf_to_docx_translator_service = PdfToDocxTranslatorService()
 pdf_to_pdf_translator_service = PdfToPdfTranslationService()
 
-def get_gcs_blob(blob_name: str) -> bytes:
-    storage_client = storage.Client()
-    bucket = storage_client.bucket(os.getenv("GCS_BUCKET_NAME"))
-    blob = bucket.blob(blob_name)
-    return blob.download_as_bytes()
-
-@router.post("/translate/document")
-async def translate_pdf(
-    file: UploadFile,
-    src_language: str = Form(...),
-    dest_language: str = Form(...),
-    dest_file: str = Form(...),
-    db: Session = Depends(get_db),
-):
-    # Create temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-        pdf_path = temp_file.name
-        temp_file.write(await file.read())
-    
-    if dest_file == "docx":
-        result = await pdf_to_docx_translator_service.process_file(pdf_path, src_language, dest_language)
-        media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-    else:
-        result = await pdf_to_pdf_translator_service.process_file(pdf_path, src_language, dest_language)
-        media_type = "application/pdf"
-
-    if "error" in result:
-        return {"error": result["error"]}
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
 
+def record_translation(db: Session, pdf_path: str, dest_file: str, result: dict):
+    """Save the File rows for an uploaded PDF and its translation; returns the translated row."""
     save_file_record(db, FileCreate(
         user_id   = 1,                           # replace with real user later
         filename  = os.path.basename(pdf_path),
@@ -57,37 +44,92 @@ async def translate_pdf(
         source    = "upload",
     ))
 
-    local_out = result["local_path"]
-    save_file_record(db, FileCreate(
+    return save_file_record(db, FileCreate(
         user_id   = 1,
-        filename  = os.path.basename(local_out),
+        filename  = os.path.basename(result["local_path"]),
         file_type = "pdf" if dest_file == "pdf" else "docx",
         file_path = result["trans_url"],
         source    = "translated",
     ))
 
-    parsed_url = urlparse(result["trans_url"])
-    path = parsed_url.path.lstrip('/')
+def ingest_and_record(service, pdf_path: str, dest_file: str, local_out: str,
+                      key: dict = None, artifact_path: str = None, progress=None):
+    """Upload and index both files, save their File rows and remember the result.
 
-    bucket_name = os.getenv("GCS_BUCKET_NAME")
+    Runs as a background task once the response has been sent, or in a job.
+    Returns the GCS URL of the translation.
+    """
+    input_url, output_url = service.ingest_results(pdf_path, local_out, progress)
+    db = SessionLocal()
+    try:
+        translated = record_translation(db, pdf_path, dest_file, {
+            "local_path": local_out,
+            "orig_url":   input_url,
+            "trans_url":  output_url,
+        })
+        translated_url = translated.file_path
+        if key is not None:
+            save_cached_result(db, key, artifact_path, translated.id)
+        return translated_url
+    finally:
+        db.close()
 
-    # Remove bucket name prefix if it exists
-    if path.startswith(f"{bucket_name}/"):
-        blob_name = path[len(bucket_name) + 1:]  # +1 to remove the extra slash
+@router.post("/translate/document")
+async def translate_pdf(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile,
+    src_language: str = Form(...),
+    dest_language: str = Form(...),
+    dest_file: str = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Spool the upload to disk and hash it off the event loop, as document jobs do
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        pdf_path = temp_file.name
+        await asyncio.to_thread(shutil.copyfileobj, file.file, temp_file)
+    content_hash = await asyncio.to_thread(hash_file, pdf_path)
+    key = cache_key(content_hash, src_language, dest_language, dest_file)
+
+    # The same document was already translated with the same settings
+    cached = await find_cached_result_async(db, key)
+    if cached is not None and not os.path.exists(cached.artifact_path):
+        # Evicted from disk: fetch it back so a hit is answered like a miss, with the file
+        url = await cached_file_url_async(db, cached)
+        if url is None or not await asyncio.to_thread(restore_artifact, url, cached.artifact_path):
+            cached = None
+    # Give the connection back to the pool; the translation can take minutes
+    await db.close()
+    if cached is not None:
+        os.unlink(pdf_path)
+        return ranged_file_response(
+            cached.artifact_path,
+            media_type=MEDIA_TYPES.get(dest_file, "application/pdf"),
+            filename=os.path.basename(cached.artifact_path),
+            range_header=request.headers.get("range"),
+        )
+
+    if dest_file == "docx":
+        service = pdf_to_docx_translator_service
     else:
-        blob_name = path
+        service = pdf_to_pdf_translator_service
+    media_type = MEDIA_TYPES.get(dest_file, "application/pdf")
+    result = await service.process_file(pdf_path, src_language, dest_language, ingest=False)
 
-    blob_bytes = get_gcs_blob(blob_name)
-    file_like = io.BytesIO(blob_bytes)
+    if "error" in result:
+        os.unlink(pdf_path)
+        return {"error": result["error"]}
+
+    local_out = result["local_path"]
+    artifact_path = await asyncio.to_thread(store_artifact, local_out, key)
 
-    # if os.path.exists(local_out):
-    #     os.unlink(local_out)
-    
-    # if os.path.exists(pdf_path):
-    #     os.unlink(pdf_path)
+    # Serve the translation straight from disk; GCS upload and indexing happen afterwards
+    background_tasks.add_task(ingest_and_record, service, pdf_path, dest_file, local_out, key, artifact_path)
 
-    return StreamingResponse(
-        file_like,
-        media_type  = media_type,
-        headers={"Content-Disposition": f"attachment; filename={os.path.basename(local_out)}"}
-    )
\ No newline at end of file
+    return ranged_file_response(
+        artifact_path,
+        media_type=media_type,
+        filename=os.path.basename(local_out),
+        range_header=request.headers.get("range"),
+        background=background_tasks,
+    )
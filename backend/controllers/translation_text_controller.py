@@ -1,6 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from ..services.text_translation_services import TranslationService
+from ..services.translate_client import get_translate_client
 import html
 
 router = APIRouter()
@@ -10,15 +12,41 @@ class TranslationRequest(BaseModel):
     text: str
     source_lang: str = 'en'  # Default to English
     dest_lang: str = 'vi'    # Default to Vietnamese
+    stream: bool = False     # Stream the translation as plain text while it is produced
+    single_call: bool = False  # Detect the source language in the translation request itself
 
 @router.post("/translate/text")
 async def translate_text_api(request: TranslationRequest):
     """API endpoint to translate text with language selection."""
-    translated_text = await translation_service.translate(
-        src_text=request.text, 
-        source_lang=request.source_lang, 
-        dest_lang=request.dest_lang
-    )
+    if request.single_call:
+        translated_text, detected_language, warnings = await translation_service.detect_and_translate(
+            src_text=request.text,
+            source_lang=request.source_lang,
+            dest_lang=request.dest_lang
+        )
+        return {
+            "original_text": request.text,
+            "source_language": request.source_lang,
+            "destination_language": request.dest_lang,
+            "translated_text": translated_text,
+            "detected_language": detected_language,
+            "warnings": warnings,
+        }
+
+    if request.stream:
+        warnings = await translation_service.check_source_language(request.text, request.source_lang)
+        if not warnings:
+            return StreamingResponse(
+                translation_service.translate_stream(request.text, request.source_lang, request.dest_lang),
+                media_type="text/plain; charset=utf-8",
+            )
+        translated_text = warnings
+    else:
+        translated_text = await translation_service.translate(
+            src_text=request.text,
+            source_lang=request.source_lang,
+            dest_lang=request.dest_lang
+        )
     
     return {
         "original_text": request.text,
@@ -26,3 +54,11 @@ async def translate_text_api(request: TranslationRequest):
         "destination_language": request.dest_lang,
         "translated_text": translated_text
     }
+
+@router.get("/translate/memory/stats")
+def translation_memory_stats():
+    """Hit/miss counters of the translation memory for this worker."""
+    memory = get_translate_client().memory
+    if memory is None:
+        return {"enabled": False}
+    return {"enabled": True, **memory.stats()}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone, timedelta
 from ..controllers.database import Base
@@ -7,6 +7,14 @@ EST = timezone(timedelta(hours=-5), name="EST")
 
 class File(Base):
     __tablename__ = "files"
+    # Listings are ordered newest first, optionally filtered by one of these columns.
+    # Existing databases get them from controllers/migrations.py.
+    __table_args__ = (
+        Index("ix_files_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_files_user_id_uploaded_at", "user_id", "uploaded_at"),
+        Index("ix_files_file_type_uploaded_at", "file_type", "uploaded_at"),
+        Index("ix_files_source_uploaded_at", "source", "uploaded_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
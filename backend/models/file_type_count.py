@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from ..controllers.database import Base
+
+class FileTypeCount(Base):
+    """Number of File rows per file_type, kept up to date on every insert and delete."""
+    __tablename__ = "file_type_counts"
+
+    file_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
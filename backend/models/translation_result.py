@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime, timezone, timedelta
+from ..controllers.database import Base
+
+EST = timezone(timedelta(hours=-5), name="EST")
+
+class TranslationResult(Base):
+    """Content-addressed cache of translated documents."""
+    __tablename__ = "translation_results"
+    __table_args__ = (
+        UniqueConstraint("content_hash", "src_language", "dest_language", "dest_file", name="uq_translation_result_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the uploaded file
+    src_language = Column(String, nullable=False)
+    dest_language = Column(String, nullable=False)
+    dest_file = Column(String, nullable=False)  # 'pdf' or 'docx'
+    file_id = Column(Integer, ForeignKey("files.id", ondelete="SET NULL"), nullable=True)  # translated File row
+    artifact_path = Column(String, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(EST))
@@ -0,0 +1,88 @@
+"""Compare search latency between keyword and hybrid mode.
+
+Runs every query against a running backend in each mode and prints
+p50/p95/mean latency, both end to end and as reported by the server
+(X-Search-Time-Ms). Requests ask the server to skip its result cache, and
+any response still served from it is left out of the numbers.
+
+    python backend/scripts/bench_search.py --base-url http://127.0.0.1:8000 \
+        --queries queries.txt --runs 20
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+
+DEFAULT_QUERIES = [
+    "invoice",
+    "quarterly financial report",
+    "employee onboarding checklist",
+    "translation of the contract",
+    "meeting notes about product launch",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_mode(client, queries, mode, runs, k, num_candidates):
+    wall, server, cached = [], [], 0
+    for _ in range(runs):
+        for query in queries:
+            params = {"query": query, "mode": mode, "k": k, "num_candidates": num_candidates}
+            started = time.perf_counter()
+            response = client.post("/search/", params=params, headers={"Cache-Control": "no-cache"})
+            elapsed = (time.perf_counter() - started) * 1000
+            response.raise_for_status()
+            # A cached response measures the cache, not the search
+            if response.headers.get("X-Cache") == "HIT":
+                cached += 1
+                continue
+            wall.append(elapsed)
+            if "X-Search-Time-Ms" in response.headers:
+                server.append(float(response.headers["X-Search-Time-Ms"]))
+    return wall, server, cached
+
+
+def summarize(values):
+    if not values:
+        return "n/a"
+    return (
+        f"p50 {percentile(values, 50):7.1f} ms  "
+        f"p95 {percentile(values, 95):7.1f} ms  "
+        f"mean {statistics.mean(values):7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--num-candidates", type=int, default=50)
+    parser.add_argument("--modes", default="keyword,hybrid")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    with httpx.Client(base_url=args.base_url, timeout=60) as client:
+        for mode in args.modes.split(","):
+            # Warm-up loads the embedding model and fills the ES caches
+            run_mode(client, queries, mode, args.warmup, args.k, args.num_candidates)
+            wall, server, cached = run_mode(client, queries, mode, args.runs, args.k, args.num_candidates)
+            print(f"{mode:8s} ({len(wall)} requests, {cached} cached responses skipped)")
+            print(f"  end to end: {summarize(wall)}")
+            print(f"  server:     {summarize(server)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,48 +2,265 @@ import json
 from pprint import pprint
 import os
 import time
-import base64
+from datetime import datetime, timezone
 from io import BytesIO
 from dotenv import load_dotenv
-from elasticsearch import Elasticsearch
-from sentence_transformers import SentenceTransformer
-from ..services.gcs_upload_service import GCSFileUploadService
+from elasticsearch import Elasticsearch, BadRequestError, NotFoundError
+from .registry import get_embedding_model, get_gcs_service
+from .text_extraction_service import extract_attachment
+from .embedding_cache_service import EmbeddingCache
+from .text_chunker import iter_passages
+from ..config.config import (
+    ES_BULK_MAX_DOCS,
+    ES_BULK_MAX_BYTES,
+    EMBEDDING_DIMS,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_ENABLED,
+    PASSAGE_CHARS,
+    PASSAGE_OVERLAP,
+    PASSAGE_MAX_COUNT,
+    SEARCH_RRF_RANK_CONSTANT,
+    SEARCH_PIT_KEEP_ALIVE,
+)
 
 load_dotenv()
 
+INDEX_NAME = "idx"
+
+# Bump the version whenever INDEX_PROPERTIES changes; bootstrap() then updates the mapping
+INDEX_MAPPING_VERSION = 4
+
+VECTOR_MAPPING = {"type": "dense_vector", "dims": EMBEDDING_DIMS, "index": True, "similarity": "cosine"}
+
+INDEX_PROPERTIES = {
+    "embedding": VECTOR_MAPPING,
+    "sql_id": {"type": "long"},
+    "source": {"type": "keyword"},
+    "user_id": {"type": "long"},
+    "uploaded_at": {"type": "date"},
+    # Long documents are searched passage by passage, each with its own vector
+    "passages": {
+        "type": "nested",
+        "properties": {
+            "text": {"type": "text"},
+            "offset": {"type": "integer"},
+            "embedding": VECTOR_MAPPING,
+        },
+    },
+}
+
+# Facet counts returned next to search hits. file_type keeps its dynamic text +
+# keyword mapping from older indices, so its keyword sub-field is aggregated.
+FACET_AGGS = {
+    "file_type": {"terms": {"field": "file_type.keyword", "size": 20}},
+    "source": {"terms": {"field": "source", "size": 10}},
+    "user_id": {"terms": {"field": "user_id", "size": 20}},
+    "year": {
+        "date_histogram": {
+            "field": "uploaded_at",
+            "calendar_interval": "year",
+            "format": "yyyy",
+            "min_doc_count": 1,
+        }
+    },
+}
+
+# Large fields that search results never need
+SEARCH_SOURCE_EXCLUDES = ["embedding", "passages"]
+
+SEARCH_SORT = [{"_score": "desc"}, {"sql_id": "asc"}]
+# Resuming after the largest `_shard_doc` skips every hit tied with the cursor's
+# score and sql_id, which the first page has already returned or dropped
+LAST_SHARD_DOC = 2**63 - 1
+
+
+class CursorExpired(Exception):
+    pass
+
+
+class IndexMappingConflict(Exception):
+    pass
+
+
+def hit_highlights(hit):
+    """Highlighted fragments of a hit, including those from matching passages."""
+    fragments = [fragment for field in hit.get("highlight", {}).values() for fragment in field]
+    for inner in hit.get("inner_hits", {}).values():
+        for inner_hit in inner["hits"]["hits"]:
+            fragments += [fragment for field in inner_hit.get("highlight", {}).values() for fragment in field]
+    return fragments
+
+
+def parse_facets(aggregations):
+    """Turn the FACET_AGGS response into {facet: {value: count}}."""
+    facets = {}
+    for name in FACET_AGGS:
+        buckets = aggregations.get(name, {}).get("buckets", [])
+        facets[name] = {
+            str(bucket.get("key_as_string", bucket["key"])): bucket["doc_count"]
+            for bucket in buckets
+        }
+    return facets
+
+
+def build_passages(text, file_name):
+    """Overlapping passages of a document's text, or a single passage with its name when it has none."""
+    passages = [
+        {"offset": offset, "text": passage}
+        for offset, passage in iter_passages(text, PASSAGE_CHARS, PASSAGE_OVERLAP)
+    ][:PASSAGE_MAX_COUNT]
+    if not passages:
+        passages = [{"offset": 0, "text": os.path.splitext(os.path.basename(file_name))[0]}]
+    return passages
+
+
+def document_key(hit):
+    """Hits are collapsed on the SQL row they describe, or kept apart by `_id` without one."""
+    return hit.get("_source", {}).get("sql_id") or hit["_id"]
+
+
+def rrf_fuse(hit_lists, rank_constant=SEARCH_RRF_RANK_CONSTANT):
+    """Merge ranked hit lists with reciprocal rank fusion, best first.
+
+    Each hit scores sum(1 / (rank_constant + rank)) over the lists it appears in.
+    Hits for the same `sql_id` are merged and only their best rank per list counts.
+    """
+    scores, hits = {}, {}
+    for hit_list in hit_lists:
+        seen = set()
+        for rank, hit in enumerate(hit_list, start=1):
+            key = document_key(hit)
+            if key in seen:
+                continue
+            seen.add(key)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rank_constant + rank)
+            hits.setdefault(key, hit)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [{**hits[key], "_rrf_score": scores[key]} for key in ranked]
+
+
+def normalize_file_type(filename, file_type=None):
+    """Map a file's extension, or an explicit file type, onto the categories used in the index."""
+    if file_type is not None:
+        file_type = file_type.lower()
+        return "image" if file_type in {"jpg", "jpeg", "png"} else file_type
+
+    _, ext = os.path.splitext(filename)
+    ext = ext.lstrip('.').lower()
+    if ext in {"pdf", "docx", "xlsx"}:
+        return ext
+    if ext in {"jpg", "jpeg", "png", "image", "img"}:
+        return "image"
+    return "uncategorized"
+
+
 class ElasticSearchService:
+    """Use the shared instance from `registry.get_elasticsearch_service()`."""
+
     def __init__(self):
-        self.model = SentenceTransformer(
-            "all-MiniLM-L6-v2"
-        )  # light-weight embedded model, k can gpu
         es_url = os.getenv("ES_URL")
         self.es = Elasticsearch(es_url)  # thay vao env
         print("Connected to Elastic search")
+        self.bootstrapped = False
+        self.embedding_cache = EmbeddingCache() if EMBEDDING_CACHE_ENABLED else None
+
+    @property
+    def model(self):
+        # Loaded on first use and shared with the rest of the process
+        return get_embedding_model()
 
     def create_index(self):
-        self.es.indices.delete(index="idx", ignore_unavailable=True)
+        self.es.indices.delete(index=INDEX_NAME, ignore_unavailable=True)
         self.es.indices.create(
-            index="idx",
-            mappings={"properties": {"embedding": {"type": "dense_vector"}}},
+            index=INDEX_NAME,
+            mappings={"_meta": {"version": INDEX_MAPPING_VERSION}, "properties": INDEX_PROPERTIES},
         )
 
+    def ensure_index(self):
+        """Create the index if missing, or add new mappings when the version changed.
+
+        Existing documents are never deleted here; use `reindex` for that.
+        Raises IndexMappingConflict when the existing mapping cannot take the
+        new properties, for instance a dense_vector whose dims changed.
+        """
+        if not self.es.indices.exists(index=INDEX_NAME):
+            self.es.indices.create(
+                index=INDEX_NAME,
+                mappings={"_meta": {"version": INDEX_MAPPING_VERSION}, "properties": INDEX_PROPERTIES},
+            )
+            return "created"
+
+        mappings = self.es.indices.get_mapping(index=INDEX_NAME)
+        meta = next(iter(mappings.values()))["mappings"].get("_meta", {})
+        if meta.get("version") == INDEX_MAPPING_VERSION:
+            return "unchanged"
+
+        try:
+            self.es.indices.put_mapping(
+                index=INDEX_NAME,
+                properties=INDEX_PROPERTIES,
+                meta={"version": INDEX_MAPPING_VERSION},
+            )
+        except BadRequestError as e:
+            # Indexing on would map new fields dynamically (passages as a plain object
+            # instead of nested), and the searches built for them would fail
+            raise IndexMappingConflict(
+                f"The {INDEX_NAME} mapping cannot be updated to version {INDEX_MAPPING_VERSION}; "
+                f"rebuild the index with reindex(): {e}"
+            ) from e
+        return "updated"
+
+    def bootstrap(self):
+        """Make sure the index exists; cheap to call when it already does.
+
+        Until it succeeds, ingestion calls it again and fails with its error.
+        """
+        result = {"index": self.ensure_index()}
+        self.bootstrapped = True
+        print(f"Elasticsearch bootstrap: {result}")
+        return result
+
     def get_embedding(self, text):
-        return self.model.encode(text)
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts, batch_size=EMBEDDING_BATCH_SIZE):
+        """Embed many texts, encoding only those not already in the embedding cache.
+
+        Misses are deduplicated and encoded together in batches of `batch_size`.
+        """
+        vectors = self.embedding_cache.get_many(texts, EMBEDDING_MODEL_NAME) if self.embedding_cache else [None] * len(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            encoded = [vector.tolist() for vector in self.model.encode(missing, batch_size=batch_size)]
+            if self.embedding_cache:
+                self.embedding_cache.put_many(missing, EMBEDDING_MODEL_NAME, encoded)
+            by_text = dict(zip(missing, encoded))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        return vectors
 
     def insert_document(self, document):
         return self.es.index(
-            index="idx",
+            index=INDEX_NAME,
             document={**document, "embedding": self.get_embedding(document["summary"])},
         )
 
+    def embed_passages(self, passage_lists):
+        """Fill in the embedding of every passage with one batched encode."""
+        passages = [passage for passage_list in passage_lists for passage in passage_list]
+        for passage, embedding in zip(passages, self.get_embeddings([passage["text"] for passage in passages])):
+            passage["embedding"] = embedding
+
     def insert_documents(self, documents):
         operations = []
-        for document in documents:
-            operations.append({"index": {"_index": "idx"}})
+        passage_lists = [build_passages(document["content"], document["name"]) for document in documents]
+        self.embed_passages(passage_lists)
+        for document, passages in zip(documents, passage_lists):
+            operations.append({"index": {"_index": INDEX_NAME}})
             operations.append(
                 {
                     **document, 
-                    "embedding": self.get_embedding(document["content"]),
+                    "passages": passages,
                     "sql_id": document["id"]
                 }
             )
@@ -56,74 +273,235 @@ class ElasticSearchService:
         return self.insert_documents(documents=documents)
 
     def search(self, **query_args):
-        return self.es.search(index="idx", **query_args)
+        return self.es.search(index=INDEX_NAME, **query_args)
 
-    def retrieve_document(self, id):
-        return self.es.get(index="idx", id=id)
-
-    def ingest_document(self, filename, file_type=None, sql_id=None):
-        if file_type is None:
-            _, ext = os.path.splitext(filename)
-            ext = ext.lstrip('.').lower()
-
-            if ext == "pdf":
-                file_type = "pdf"
-            elif ext == "docx":
-                file_type = "docx"
-            elif ext == "xlsx":
-                file_type = "xlsx"
-            elif ext in {"jpg", "jpeg", "png"}:
-                file_type = "image"
-            else:
-                file_type = "uncategorized"
+    def open_point_in_time(self, keep_alive=SEARCH_PIT_KEEP_ALIVE):
+        return self.es.open_point_in_time(index=INDEX_NAME, keep_alive=keep_alive)["id"]
+
+    def close_point_in_time(self, pit_id):
+        try:
+            self.es.close_point_in_time(id=pit_id)
+        except NotFoundError:
+            pass
+
+    def facet_counts(self, query=None):
+        """Facet counts over the documents matching `query` (all documents by default)."""
+        results = self.es.search(
+            index=INDEX_NAME,
+            query=query or {"match_all": {}},
+            size=0,
+            aggs=FACET_AGGS,
+            track_total_hits=True,
+        )
+        return {"total": results["hits"]["total"]["value"], **parse_facets(results.get("aggregations", {}))}
+
+    def search_page(self, query, pit_id, size, search_after=None, track_total_hits=False,
+                    highlight=None, aggs=None, keep_alive=SEARCH_PIT_KEEP_ALIVE):
+        """One page of a search sorted by score with `sql_id` as tiebreaker.
+
+        Passing the last hit's `sort` as `search_after` fetches the next page
+        without the cost of `from`, so deep pages are as cheap as the first.
+        The first page (`pit_id` None) searches the index directly; later pages
+        run against the point in time `pit_id` and also sort on `_shard_doc`.
+        """
+        args = {
+            "query": query,
+            "size": size,
+            "sort": list(SEARCH_SORT),
+            "track_total_hits": track_total_hits,
+            "source_excludes": SEARCH_SOURCE_EXCLUDES,
+        }
+        if pit_id:
+            args["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+            # Explicit, so ES does not add its implicit PIT tiebreaker and the sort
+            # values always have the same shape
+            args["sort"].append({"_shard_doc": "asc"})
+            if search_after and len(search_after) < len(args["sort"]):
+                # The cursor comes from the first page, which had no PIT
+                search_after = [*search_after, LAST_SHARD_DOC]
         else:
-            file_type = file_type.lower()
-            if file_type in {"jpg", "jpeg", "png"}:
-                file_type = "image"
+            args["index"] = INDEX_NAME
+        if search_after:
+            args["search_after"] = search_after
+        if highlight:
+            args["highlight"] = highlight
+        if aggs:
+            args["aggs"] = aggs
+        try:
+            return self.es.search(**args)
+        except NotFoundError as e:
+            raise CursorExpired(str(e)) from e
+
+    def hybrid_search(self, keyword_query, query_text, filters, size, k, num_candidates, highlight=None, aggs=None):
+        """BM25 and kNN in a single msearch, fused in the app with RRF.
+
+        Fusing here rather than with `rank.rrf` keeps it working on a basic license.
+        Returns the fused hits, best first, and the keyword search response
+        (for its hit total and aggregations).
+        """
+        knn = {
+            "field": "passages.embedding",
+            "query_vector": self.get_embedding(query_text),
+            "k": k,
+            "num_candidates": max(num_candidates, k),
+        }
+        if filters:
+            knn["filter"] = filters
+
+        searches = [
+            {"index": INDEX_NAME},
+            {
+                "query": keyword_query,
+                "size": max(size, k),
+                "collapse": {"field": "sql_id"},
+                "_source": {"excludes": SEARCH_SOURCE_EXCLUDES},
+                **({"highlight": highlight} if highlight else {}),
+                **({"aggs": aggs} if aggs else {}),
+            },
+            {"index": INDEX_NAME},
+            {"knn": knn, "size": k, "_source": {"excludes": SEARCH_SOURCE_EXCLUDES}},
+        ]
+        responses = self.es.msearch(searches=searches)["responses"]
+        for response in responses:
+            if "error" in response:
+                raise Exception(f"Search error: {response['error']}")
+        fused = rrf_fuse([response["hits"]["hits"] for response in responses])
+        return fused, responses[0]
+
+    def retrieve_document(self, id):
+        return self.es.get(index=INDEX_NAME, id=id)
+
+    def ingest_document(self, filename, file_type=None, sql_id=None, source="upload", user_id=1):
+        file_type = normalize_file_type(filename, file_type)
 
         if filename[0] != "/":
             file_path = os.path.join(os.getcwd(), "backend/misc", filename)
         else:
             file_path = filename
 
-        with open(file_path, "rb") as pdf_file:
-            enc_file = base64.b64encode(pdf_file.read()).decode("utf-8")
-        
+        if not self.bootstrapped:
+            # Startup could not reach the cluster or update the mapping; nothing is uploaded until it can
+            self.bootstrap()
+
+        attachment = extract_attachment(file_path)
+
         url = self.upload_file(file_path, file_type)
-        
+
         os.remove(file_path)
 
-        resp = self.es.ingest.put_pipeline(
-            id="attachment",
-            description="Extract attachment information",
-            processors=[{"attachment": {
-                "field": "data", 
-                "properties": ["content", "date", "title", "content_length"],
-                "remove_binary": True
-                }}],
-        )
-        print(resp)
+        passages = build_passages(attachment.pop("content"), file_path)
+        self.embed_passages([passages])
 
         document = {
-            "data": enc_file,
+            "attachment": attachment,
+            "passages": passages,
             "file_type": file_type,
             "file_name": os.path.basename(file_path),
             "file_path": url,
             "sql_id": sql_id,
+            "source": source,
+            "user_id": user_id,
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
         }
 
+        # Callers refresh once per request or job with `refresh_index`
         resp1 = self.es.index(
-            index="idx",
-            pipeline="attachment",
+            index=INDEX_NAME,
             document=document,
         )
         print(resp1)
 
         return url
-    
+
+    def bulk_ingest(self, items, max_docs=ES_BULK_MAX_DOCS, max_bytes=ES_BULK_MAX_BYTES):
+        """Index already-uploaded files through `es.bulk` in sized batches.
+
+        Each item is a dict with `file_path`, `file_type`, `url` and `sql_id`,
+        and optionally `source`, `user_id` and `uploaded_at`.
+        Returns one error message (or None) per item, in order. A file that
+        cannot be read or a batch that cannot be sent only fails its own items.
+        """
+        if not self.bootstrapped:
+            self.bootstrap()
+
+        errors = [None] * len(items)
+        operations, batch, batch_bytes = [], [], 0
+
+        def flush():
+            try:
+                # One batched encode per bulk request
+                self.embed_passages([document["passages"] for document in operations[1::2]])
+                resp = self.es.bulk(index=INDEX_NAME, operations=operations)
+            except Exception as e:
+                for position in batch:
+                    errors[position] = str(e)
+                return
+            for position, entry in zip(batch, resp["items"]):
+                result = entry.get("index", {})
+                if "error" in result:
+                    errors[position] = str(result["error"].get("reason", result["error"]))
+
+        for position, item in enumerate(items):
+            try:
+                attachment = extract_attachment(item["file_path"])
+            except Exception as e:
+                errors[position] = f"Text extraction failed: {e}"
+                continue
+            passages = build_passages(attachment.pop("content"), item["file_path"])
+            # Approximate request size: passage text plus roughly 10 bytes per vector value in JSON
+            size = sum(len(passage["text"].encode("utf-8")) for passage in passages)
+            size += len(passages) * EMBEDDING_DIMS * 10
+
+            if batch and (len(batch) >= max_docs or batch_bytes + size > max_bytes):
+                flush()
+                operations, batch, batch_bytes = [], [], 0
+
+            operations.append({"index": {}})
+            operations.append({
+                "attachment": attachment,
+                "passages": passages,
+                "file_type": item["file_type"],
+                "file_name": os.path.basename(item["file_path"]),
+                "file_path": item["url"],
+                "sql_id": item["sql_id"],
+                "source": item.get("source", "upload"),
+                "user_id": item.get("user_id", 1),
+                "uploaded_at": item.get("uploaded_at") or datetime.now(timezone.utc).isoformat(),
+            })
+            batch.append(position)
+            batch_bytes += size
+
+        if batch:
+            flush()
+        self.refresh_index()
+        return errors
+
+    def refresh_index(self):
+        """Make everything indexed so far searchable.
+
+        Called once after a request's or job's ingests, before the search
+        cache is invalidated, so cached searches rebuilt afterwards include them.
+        """
+        try:
+            self.es.indices.refresh(index=INDEX_NAME)
+        except Exception as e:
+            # The documents are indexed; they become searchable at the next periodic refresh
+            print(f"Refresh of {INDEX_NAME} failed: {e}")
+
+    def delete_documents(self, sql_ids):
+        """Remove the documents of the given `files` rows from the index."""
+        if not sql_ids:
+            return 0
+        resp = self.es.delete_by_query(
+            index=INDEX_NAME,
+            query={"terms": {"sql_id": list(sql_ids)}},
+            conflicts="proceed",
+            refresh=True,
+        )
+        return resp.get("deleted", 0)
+
     def upload_file(self, file_path, file_type):
         gcs_path = f"{file_type}/{os.path.basename(file_path)}"
-        uploader = GCSFileUploadService()
-        gcs_url = uploader.upload_file(file_path, gcs_path)
+        gcs_url = get_gcs_service().upload_file(file_path, gcs_path)
 
         return gcs_url
\ No newline at end of file
@@ -0,0 +1,64 @@
+import hashlib
+import time
+from array import array
+
+from ..config.config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_LRU_SIZE
+from .sqlite_store import TieredCache
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(TieredCache):
+    """Embeddings keyed by content hash and model name: an in-process LRU backed by SQLite.
+
+    Vectors are stored as float32 blobs. Changing the model name never
+    returns vectors computed by another model.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (model, content_hash)
+        )
+        """,
+    )
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, lru_size: int = EMBEDDING_CACHE_LRU_SIZE):
+        super().__init__(path, lru_size)
+
+    def _fetch(self, conn, keys):
+        by_model = {}
+        for model, digest in keys:
+            by_model.setdefault(model, []).append(digest)
+        for model, digests in by_model.items():
+            rows = self.select_in(
+                conn,
+                "SELECT content_hash, vector FROM embeddings WHERE model = ? AND content_hash IN ({})",
+                digests,
+                (model,),
+            )
+            for digest, blob in rows:
+                yield (model, digest), array("f", blob).tolist()
+
+    def _write(self, conn, entries):
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+            [(model, digest, array("f", vector).tobytes(), now) for (model, digest), vector in entries],
+        )
+
+    def get_many(self, texts: list, model: str) -> list:
+        """Return the cached vector (a list of floats) for each text, or None on a miss."""
+        return self.lookup([(model, content_hash(text)) for text in texts])
+
+    def put_many(self, texts: list, model: str, vectors: list):
+        self.store([
+            ((model, content_hash(text)), [float(value) for value in vector])
+            for text, vector in zip(texts, vectors)
+        ])
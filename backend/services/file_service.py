@@ -1,6 +1,14 @@
+from collections import Counter
+
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from ..models.file import File
+from ..models.file_type_count import FileTypeCount
 from ..schemas.file import FileCreate
+from .search_cache_service import invalidate_search_cache
+
+IMAGE_TYPES = ["jpg", "jpeg", "png", "image"]
 
 def save_file_record(db: Session, file_data: FileCreate) -> File:
     """
@@ -10,15 +18,91 @@ def save_file_record(db: Session, file_data: FileCreate) -> File:
     """
     db_file = File(**file_data.dict())
     db.add(db_file)
+    adjust_file_type_counts(db, {db_file.file_type: 1})
     db.commit()
     db.refresh(db_file)
+    # Generated and translated files show up in search
+    invalidate_search_cache()
+    return db_file
+
+async def save_file_record_async(db: AsyncSession, file_data: FileCreate) -> File:
+    """`save_file_record` for an AsyncSession."""
+    db_file = File(**file_data.dict())
+    db.add(db_file)
+    await adjust_file_type_counts_async(db, {db_file.file_type: 1})
+    await db.commit()
+    await db.refresh(db_file)
+    invalidate_search_cache()
     return db_file
 
+def _upsert(dialect_name: str):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+def _file_type_count_statements(dialect_name: str, deltas: dict) -> list:
+    deltas = {file_type: delta for file_type, delta in Counter(deltas).items() if delta}
+    insert = _upsert(dialect_name)
+    statements = []
+    for file_type, delta in deltas.items():
+        stmt = insert(FileTypeCount).values(file_type=file_type, count=max(delta, 0))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileTypeCount.file_type],
+            set_={"count": FileTypeCount.count + delta},
+        )
+        statements.append(stmt)
+    return statements
+
+def adjust_file_type_counts(db: Session, deltas: dict):
+    """
+    Add `deltas` ({file_type: +n or -n}) to the per-type counters.
+    Runs in the caller's transaction, so the counters commit with the rows.
+    """
+    for stmt in _file_type_count_statements(db.get_bind().dialect.name, deltas):
+        db.execute(stmt)
+
+async def adjust_file_type_counts_async(db: AsyncSession, deltas: dict):
+    """`adjust_file_type_counts` for an AsyncSession."""
+    for stmt in _file_type_count_statements(db.bind.dialect.name, deltas):
+        await db.execute(stmt)
+
+def seed_file_type_counts(db: Session):
+    """
+    Set the counters to one GROUP BY over `files`.
+    Run once per database by controllers/migrations.py; afterwards every
+    insert and delete keeps them up to date.
+    """
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        # Hold inserts and deletes on files until the counters are written, so an
+        # upload in between is neither missed nor counted twice
+        db.execute(text("LOCK TABLE files IN SHARE MODE"))
+    rows = (
+        db.query(File.file_type, func.count(File.id))
+        .group_by(File.file_type)
+        .order_by(File.file_type)
+        .all()
+    )
+    insert = _upsert(dialect_name)
+    for file_type, count in rows:
+        # A counter written by an upload before the lock is already in `count`
+        stmt = insert(FileTypeCount).values(file_type=file_type, count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileTypeCount.file_type],
+            set_={"count": stmt.excluded.count},
+        )
+        db.execute(stmt)
+    db.commit()
+
 def get_summary(db: Session):
+    """Per-type totals for the dashboard, read from the counters in one query."""
+    counts = dict(db.query(FileTypeCount.file_type, FileTypeCount.count).all())
     summary = {
-        "pdf": db.query(File).filter(File.file_type == "pdf").count(),
-        "docx": db.query(File).filter(File.file_type == "docx").count(),
-        "xlsx": db.query(File).filter(File.file_type == "xlsx").count(),
-        "image": db.query(File).filter(File.file_type.in_(["jpg", "jpeg", "png", "image"])).count()
+        "pdf": counts.get("pdf", 0),
+        "docx": counts.get("docx", 0),
+        "xlsx": counts.get("xlsx", 0),
+        "image": sum(counts.get(file_type, 0) for file_type in IMAGE_TYPES)
     }
-    return summary
\ No newline at end of file
+    return summary
@@ -0,0 +1,74 @@
+import os
+import re
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+CHUNK_SIZE = 256 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, file_size: int):
+    """Return the inclusive (start, end) byte range requested, or None for the whole file.
+
+    Multi-range requests are answered with the whole file.
+    """
+    if not range_header:
+        return None
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last `end` bytes
+        length = int(end)
+        if length == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+        return max(0, file_size - length), file_size - 1
+
+    start = int(start)
+    end = int(end) if end else file_size - 1
+    if start >= file_size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+    return start, min(end, file_size - 1)
+
+
+def iter_file(path: str, start: int, end: int, chunk_size: int = CHUNK_SIZE):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(path: str, media_type: str, filename: str, range_header: str = None, background=None):
+    """Stream a local file in chunks, honouring a single HTTP Range."""
+    file_size = os.path.getsize(path)
+    byte_range = parse_range(range_header, file_size)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+
+    if byte_range is None:
+        start, end, status_code = 0, file_size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    return StreamingResponse(
+        iter_file(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+        background=background,
+    )
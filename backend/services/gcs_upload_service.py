@@ -30,19 +30,35 @@ class GCSFileUploadService:
         url = blob.generate_signed_url(expiration=timedelta(hours=720))
         return url
     
-    def delete_gcs_file(self, file_url: str):
+    def _blob_for_url(self, file_url: str):
         parsed = urlparse(file_url)
 
         parts = parsed.path.lstrip('/').split('/', 1)
         if len(parts) != 2:
             print(f"Invalid GCS URL format: {file_url}")
-            return False
+            return None, None
 
         bucket_name = parts[0]
         blob_name = unquote(parts[1])
 
         bucket = self.storage_client.bucket(bucket_name)
-        blob = bucket.blob(blob_name)
+        return bucket.blob(blob_name), blob_name
+
+    def download_file(self, file_url: str, local_file_path: str) -> bool:
+        """Download the object behind a (signed) GCS URL; False if it does not exist."""
+        blob, blob_name = self._blob_for_url(file_url)
+        if blob is None:
+            return False
+        if not blob.exists():
+            print(f"File not found: {blob_name}")
+            return False
+        blob.download_to_filename(local_file_path)
+        return True
+
+    def delete_gcs_file(self, file_url: str):
+        blob, blob_name = self._blob_for_url(file_url)
+        if blob is None:
+            return False
 
         if not blob.exists():
             print(f"File not found: {blob_name}")
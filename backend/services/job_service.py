@@ -0,0 +1,265 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+from ..config.config import JOB_WORKERS, JOB_STORE_PATH
+from .sqlite_store import SQLiteStore
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = {COMPLETED, FAILED, CANCELLED}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _process_alive(pid) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_input(job: dict):
+    """Delete the upload a job was created with; handlers remove it themselves once they run."""
+    path = job["params"].get("input_path")
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class JobStore(SQLiteStore):
+    """Jobs persisted in a local SQLite file so their state survives restarts."""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL,
+            stage TEXT,
+            progress TEXT NOT NULL,
+            params TEXT NOT NULL,
+            result TEXT,
+            error TEXT,
+            owner_pid INTEGER,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """,
+    )
+    ROW_FACTORY = sqlite3.Row
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        super().__init__(path)
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "progress": json.loads(row["progress"]),
+            "params": json.loads(row["params"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "owner_pid": row["owner_pid"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def create(self, kind: str, params: dict) -> dict:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            conn = self.connection()
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, progress, params, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, "{}", json.dumps(params), now, now),
+            )
+            conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str):
+        with self.lock:
+            row = self.connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def update(self, job_id: str, **fields):
+        for key in ("progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self.lock:
+            conn = self.connection()
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            conn.commit()
+
+    def claim(self, job_id: str, owner_pid: int) -> bool:
+        """Atomically move a queued job to running; False if another worker got it first."""
+        with self.lock:
+            conn = self.connection()
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner_pid = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, owner_pid, time.time(), job_id, QUEUED),
+            )
+            conn.commit()
+        return cursor.rowcount == 1
+
+    def get_status(self, job_id: str):
+        with self.lock:
+            row = self.connection().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def list_by_status(self, status: str) -> list:
+        with self.lock:
+            rows = self.connection().execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+
+class JobProgress:
+    """Progress reporter handed to a job handler.
+
+    Call it as `progress(stage, done=None, total=None)`; per-stage counters
+    (pages, chunks, files) are kept in the job record.
+    """
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.stages = {}
+        self.cancelled = False
+
+    def __call__(self, stage: str, done: int = None, total: int = None):
+        # The job may have been cancelled through another uvicorn worker
+        if self.cancelled or self.store.get_status(self.job_id) == CANCELLED:
+            self.cancelled = True
+            raise JobCancelled()
+        entry = self.stages.setdefault(stage, {})
+        if done is not None:
+            entry["done"] = done
+        if total is not None:
+            entry["total"] = total
+        self.store.update(self.job_id, stage=stage, progress=self.stages)
+
+
+class JobService:
+    """Runs registered job handlers on a bounded pool of asyncio workers."""
+
+    def __init__(self, store: JobStore = None, workers: int = JOB_WORKERS):
+        self.store = store or JobStore()
+        self.workers = max(1, workers)
+        self.handlers = {}
+        self.queue = None
+        self._worker_tasks = []
+        self._running = {}
+
+    def register(self, kind: str, handler):
+        """`handler(params, progress)` is a coroutine returning the job result dict."""
+        self.handlers[kind] = handler
+
+    async def start(self):
+        if self._worker_tasks:
+            return
+        self.queue = asyncio.Queue()
+        # Jobs whose worker process is gone cannot be resumed
+        for job in self.store.list_by_status(RUNNING):
+            if not _process_alive(job["owner_pid"]):
+                self.store.update(job["id"], status=FAILED, error="Interrupted by a server restart")
+                _remove_input(job)
+        for job in self.store.list_by_status(QUEUED):
+            self.queue.put_nowait(job["id"])
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, kind: str, params: dict) -> dict:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        await self.start()
+        job = self.store.create(kind, params)
+        self.queue.put_nowait(job["id"])
+        return job
+
+    def get(self, job_id: str):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str):
+        """Cancel a job; call from the event loop, since it cancels the job's task."""
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATES:
+            return job
+        running = self._running.get(job_id)
+        if running is not None:
+            task, progress = running
+            progress.cancelled = True
+            task.cancel()
+        self.store.update(job_id, status=CANCELLED)
+        if job["status"] == QUEUED:
+            # The job will never reach its handler, which is what removes the upload
+            _remove_input(job)
+        return self.store.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        if not self.store.claim(job_id, os.getpid()):
+            job = self.store.get(job_id)
+            # Cancelled while queued, possibly through another worker
+            if job is not None and job["status"] == CANCELLED:
+                _remove_input(job)
+            return
+
+        job = self.store.get(job_id)
+        progress = JobProgress(self.store, job_id)
+        task = asyncio.create_task(self.handlers[job["kind"]](job["params"], progress))
+        self._running[job_id] = (task, progress)
+        try:
+            result = await task
+            if self.store.get_status(job_id) == CANCELLED:
+                return
+            self.store.update(job_id, status=COMPLETED, result=result)
+        except JobCancelled:
+            self.store.update(job_id, status=CANCELLED)
+        except asyncio.CancelledError:
+            if not progress.cancelled:
+                # The worker itself is shutting down
+                self.store.update(job_id, status=FAILED, error="Interrupted by a server shutdown")
+                raise
+            self.store.update(job_id, status=CANCELLED)
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e))
+        finally:
+            self._running.pop(job_id, None)
+
+
+job_service = JobService()
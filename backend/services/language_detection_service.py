@@ -1,10 +1,42 @@
+import hashlib
+from collections import OrderedDict
 from googletrans import Translator
+from .local_language_detector import LocalLanguageDetector, sample_text
+from ..config.config import (
+    LANGUAGE_DETECTION_SAMPLE_CHARS,
+    LANGUAGE_DETECTION_MIN_CONFIDENCE,
+    LANGUAGE_DETECTION_CACHE_SIZE,
+)
 
 class LanguageDetectionService:
     def __init__(self):
         self.translator = Translator()
+        self.local_detector = LocalLanguageDetector()
+        self.cache = OrderedDict()
 
     async def detect_language(self, text: str) -> str:
-        """Detect the language of the provided text."""
-        detection = await self.translator.detect(text)
-        return detection.lang
+        """Detect the language of the provided text.
+
+        Only a bounded sample of the text is inspected. The local detector answers
+        when it is confident enough; otherwise the sample is sent to googletrans.
+        """
+        sample = sample_text(text, LANGUAGE_DETECTION_SAMPLE_CHARS)
+        key = hashlib.sha1(f"{len(text)}:{sample}".encode("utf-8")).hexdigest()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        lang, confidence = self.local_detector.detect(sample)
+        if lang is None or confidence < LANGUAGE_DETECTION_MIN_CONFIDENCE:
+            try:
+                detection = await self.translator.detect(sample)
+                lang = detection.lang
+            except Exception:
+                # Offline: keep the local guess if there is one
+                if lang is None:
+                    raise
+
+        self.cache[key] = lang
+        if len(self.cache) > LANGUAGE_DETECTION_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return lang
@@ -0,0 +1,193 @@
+import re
+import unicodedata
+from collections import Counter
+
+# Non-Latin scripts identify the language (or a small family) on their own.
+# Codes follow what googletrans returns so callers can compare them directly.
+SCRIPT_RANGES = [
+    (0x0370, 0x03FF, "el"),
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x0590, 0x05FF, "iw"),
+    (0x0600, 0x06FF, "ar"),
+    (0x0900, 0x097F, "hi"),
+    (0x0980, 0x09FF, "bn"),
+    (0x0E00, 0x0E7F, "th"),
+    (0x10A0, 0x10FF, "ka"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "ko"),
+    (0x1100, 0x11FF, "ko"),
+]
+
+# Letters outside a-z that each profiled language writes. Text using other
+# letters is in a language without a profile here (Finnish, Romanian, ...).
+ALPHABETS = {
+    "en": set(),
+    "vi": set("àáâãèéêìíòóôõùúýăđĩũơư") | {chr(c) for c in range(0x1EA0, 0x1EFA)},
+    "fr": set("àâæçéèêëîïôœùûüÿ"),
+    "es": set("áéíóúñü"),
+    "pt": set("áâãàçéêíóôõú"),
+    "de": set("äöüß"),
+    "it": set("àèéìíîòóùú"),
+    "nl": set("éèëïóöü"),
+    "id": set(),
+    "pl": set("ąćęłńóśźż"),
+    "tr": set("çğıöşüâîû"),
+}
+# Loanwords and names may bring in a few foreign letters
+MAX_FOREIGN_LETTER_SHARE = 0.02
+# The best language must score at least this many times the runner-up
+MIN_SCORE_RATIO = 2.0
+
+# Persian and Urdu letters; Arabic script without them is taken as Arabic
+NON_ARABIC_LETTERS = set("پچژگکیٹڈڑںےہ")
+
+# Letters that (almost) only appear in one Latin-script language
+DISTINCTIVE_CHARS = {
+    "vi": set("ăơưđ") | {chr(c) for c in range(0x1EA0, 0x1EFA)},
+    "de": set("ßäöü"),
+    "es": set("ñ¿¡"),
+    "pt": set("ãõ"),
+    "fr": set("œçèêëîïûù"),
+    "pl": set("łąęśźżćń"),
+    "tr": set("ğışİ"),
+}
+
+DISTINCTIVE_NGRAMS = {
+    "en": ["the", "ing", " th", "and", "tion"],
+    "fr": ["eau", "ent ", "les ", "que ", "tion"],
+    "es": ["ción", "los ", "que ", "ado", "ente"],
+    "pt": ["ção", "ões", "nho", "lho", "que "],
+    "de": ["sch", "ich", "ein", "der ", "und "],
+    "it": ["zione", "gli", "che ", "ell", "to "],
+    "nl": ["ij", "oe", "aa", "sch", "een "],
+    "id": ["ng ", "nya", "kan ", "ang", "yang"],
+    "vi": ["ng ", "nh ", "ươ", "iê", "uy"],
+}
+
+STOPWORDS = {
+    "en": "the of and to in is that it for on was with as be by this are at from or an have not which but you they we his her their has were will would can there what all about".split(),
+    "vi": "và của là có không được cho những các một trong người này với đã để khi đến thì như cũng tôi chúng ta họ nhưng vì nên rất làm ra".split(),
+    "fr": "le la les de des du et est un une que qui dans pour pas sur au avec ce il elle nous vous sont mais ou par plus se ne cette".split(),
+    "es": "el la los las de del y que en un una es por con para no se su al lo como más pero sus le ya o este sí porque esta".split(),
+    "pt": "o a os as de do da dos das e que em um uma é para com não se na no por mais como mas foi ao ele ela".split(),
+    "de": "der die das und ist nicht ein eine zu den mit von sich des auf für im dem auch es an als wie wir ich sie".split(),
+    "it": "il lo la gli le di del della e che un una è per non con si in sono ma come anche questo ha più".split(),
+    "nl": "de het een en van is dat niet op te zijn voor met die in aan er maar om ook als bij hij ze".split(),
+    "id": "yang dan di ini itu dengan untuk tidak dari dalam akan pada juga ke karena ada oleh saya mereka kami adalah".split(),
+    "pl": "i w nie na się z że do to jest jak ale o co od po tak za przez dla".split(),
+    "tr": "ve bir bu da de için ile değil çok daha gibi olarak ama ne var olan kadar".split(),
+}
+STOPWORDS = {lang: set(words) for lang, words in STOPWORDS.items()}
+
+WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def sample_text(text: str, sample_chars: int, windows: int = 4) -> str:
+    """Take `windows` evenly spread slices of `text` totalling about `sample_chars`."""
+    if len(text) <= sample_chars:
+        return text
+    width = sample_chars // windows
+    step = (len(text) - width) // (windows - 1)
+    return " ".join(text[i * step:i * step + width] for i in range(windows))
+
+
+class LocalLanguageDetector:
+    """Offline detector using Unicode scripts, distinctive letters, character n-grams and stopwords."""
+
+    def __init__(self, min_letters: int = 12):
+        self.min_letters = min_letters
+
+    @staticmethod
+    def _script(char: str):
+        code = ord(char)
+        if code < 0x80:
+            return "latin" if char.isalpha() else None
+        for start, end, script in SCRIPT_RANGES:
+            if start <= code <= end:
+                return script
+        return "latin" if char.isalpha() else None
+
+    def _detect_script(self, scripts: Counter, letters: int, text: str):
+        script, count = scripts.most_common(1)[0]
+        share = count / letters
+
+        if script in ("han", "kana"):
+            # Japanese mixes kanji with kana; Chinese has no kana at all
+            if scripts.get("kana", 0) / letters > 0.05:
+                return "ja", share + scripts.get("han", 0) / letters
+            return "zh-CN", share
+        if script == "ar" and any(c in NON_ARABIC_LETTERS for c in text):
+            return "ar", share * 0.4
+        if script == "cyrillic":
+            if any(c in text for c in "іїєґ"):
+                return "uk", share
+            if any(c in text for c in "ыэъё"):
+                return "ru", share
+            return "ru", share * 0.4
+        return script, share
+
+    def _candidates(self, lowered: str, letters: int):
+        """The profiled languages whose alphabet covers the letters of `lowered`."""
+        extra = Counter(c for c in lowered if ord(c) >= 0x80 and c.isalpha())
+        candidates = []
+        for lang, alphabet in ALPHABETS.items():
+            foreign = sum(count for c, count in extra.items() if c not in alphabet)
+            if foreign <= MAX_FOREIGN_LETTER_SHARE * letters:
+                candidates.append(lang)
+        return candidates
+
+    def _score_latin(self, lowered: str, candidates: list):
+        words = Counter(WORD_RE.findall(lowered))
+        char_counts = Counter(lowered)
+        scores, stopword_hits = Counter(), Counter()
+
+        for lang in candidates:
+            stopword_hits[lang] = sum(count for word, count in words.items() if word in STOPWORDS[lang])
+            scores[lang] += stopword_hits[lang]
+            chars = DISTINCTIVE_CHARS.get(lang, ())
+            scores[lang] += 2 * sum(char_counts[c] for c in chars if c in char_counts)
+            scores[lang] += 0.2 * sum(lowered.count(ngram) for ngram in DISTINCTIVE_NGRAMS.get(lang, ()))
+
+        return scores, stopword_hits, sum(words.values())
+
+    def detect(self, text: str):
+        """Return (language code, confidence in [0, 1]); the code is None when nothing was found.
+
+        Latin-script text only gets a confident answer for a profiled language
+        whose alphabet fits the text, whose stopwords appear in it and which
+        clearly beats the runner-up.
+        """
+        text = unicodedata.normalize("NFC", text)
+        scripts = Counter()
+        for char, count in Counter(text).items():
+            script = self._script(char)
+            if script:
+                scripts[script] += count
+        letters = sum(scripts.values())
+        if letters < self.min_letters:
+            return None, 0.0
+
+        if scripts.most_common(1)[0][0] != "latin":
+            lang, confidence = self._detect_script(scripts, letters, text)
+            return lang, min(confidence, 1.0)
+
+        lowered = text.lower()
+        candidates = self._candidates(lowered, letters)
+        if not candidates:
+            return None, 0.0
+        scores, stopword_hits, word_count = self._score_latin(lowered, candidates)
+        ranked = scores.most_common(2)
+        best_lang, best = ranked[0]
+        second = ranked[1][1] if len(ranked) > 1 else 0
+        # Letters and n-grams are shared across languages; only stopwords tell them apart
+        if best <= 0 or word_count == 0 or stopword_hits[best_lang] == 0:
+            return None, 0.0
+        if best < MIN_SCORE_RATIO * second:
+            return best_lang, 0.0
+
+        margin = (best - second) / best
+        # Few matching words in a long text means we are probably looking at another language
+        coverage = min(1.0, stopword_hits[best_lang] / (0.2 * word_count))
+        return best_lang, round(margin * coverage, 4)
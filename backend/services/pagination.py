@@ -0,0 +1,26 @@
+import base64
+import hashlib
+import json
+
+
+def encode_cursor(state: dict) -> str:
+    """Pack paging state into an opaque, URL-safe cursor string."""
+    raw = json.dumps(state, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Inverse of `encode_cursor`; raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
+
+
+def fingerprint(*parts) -> str:
+    """Short digest of the request parameters a cursor belongs to."""
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:16]
@@ -1,81 +1,150 @@
 import pymupdf
 from docx import Document
 from docx.shared import Pt
-from .translate_client import TranslateClient
+from .translate_client import get_translate_client
 from ..services.language_detection_service import LanguageDetectionService
-from ..services.elasticsearch_service import ElasticSearchService
+from .registry import get_elasticsearch_service
+from ..config.config import PDF_DOCX_PAGES_PER_BATCH
+import asyncio
 import time
+import uuid
 import os
 
+
+def extract_block_records(doc, start: int, stop: int):
+    """Return compact (text, font, size) records for the text blocks of pages [start, stop).
+
+    The font is the one covering most characters of the block.
+    """
+    records = []
+    for page_num in range(start, stop):
+        page = doc.load_page(page_num)
+        # TEXTFLAGS_TEXT leaves image data out of the dict
+        blocks = page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]
+
+        for block in blocks:
+            if block['type'] != 0:  # Only process text blocks (not images)
+                continue
+
+            lines = []
+            font_chars = {}
+            for line in block["lines"]:
+                lines.append("".join(span["text"] for span in line["spans"]))
+                for span in line["spans"]:
+                    key = (span["font"], span["size"])
+                    font_chars[key] = font_chars.get(key, 0) + len(span["text"])
+
+            if not font_chars:
+                continue
+            font_name, font_size = max(font_chars, key=font_chars.get)
+            records.append((" ".join(lines), font_name, font_size))
+    return records
+
+
 class PdfToDocxTranslatorService:
     def __init__(self):
-        self.translate_client = TranslateClient()
+        self.translate_client = get_translate_client()
         self.language_detector = LanguageDetectionService()
 
     async def translate_text(self, target: str, text: str):
         if isinstance(text, bytes):
             text = text.decode("utf-8")
 
-        result = self.translate_client.translate(text, target_language=target)
+        return await self.translate_client.translate_text(text, target)
 
-        return result["translatedText"]
+    async def translate_pdf(self, input_path: str, output_path: str, src_language: str, dest_language: str, progress=None):
+        """Extract text from a PDF, detect its language, compare with the selected source language, and translate.
 
-    async def translate_pdf(self, input_path: str, output_path: str, src_language: str, dest_language: str):
-        """Extract text from a PDF, detect its language, compare with the selected source language, and translate."""
+        Pages are handled in windows of PDF_DOCX_PAGES_PER_BATCH: the next window is
+        extracted in a thread while the current one is translated in one batch and
+        appended to the document, so only one window of source blocks is held at a time.
+        """
         doc = pymupdf.open(input_path)
         document = Document()
-        alltext = ""
         warnings = []
 
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            blocks = page.get_text("dict")["blocks"]
+        page_count = len(doc)
+        windows = [
+            (start, min(start + PDF_DOCX_PAGES_PER_BATCH, page_count))
+            for start in range(0, page_count, PDF_DOCX_PAGES_PER_BATCH)
+        ]
+        pending = None
 
-            for block in blocks:
-                if block['type'] == 0:  # Only process text blocks (not images)
-                    for line in block["lines"]:
-                        for span in line["spans"]:
-                            alltext += span["text"]
+        try:
+            for index, (start, stop) in enumerate(windows):
+                if pending is None:
+                    pending = asyncio.create_task(asyncio.to_thread(extract_block_records, doc, start, stop))
+                records = await pending
+                pending = None
+                if index + 1 < len(windows):
+                    pending = asyncio.create_task(asyncio.to_thread(extract_block_records, doc, *windows[index + 1]))
 
-                    # Detect the language of the extracted text
-                    # detected_language = await self.language_detector.detect_language(alltext)
+                # Detect the language of the extracted text
+                # detected_language = await self.language_detector.detect_language(alltext)
 
-                    # # Compare detected language with the user's selected source language
-                    # if detected_language != src_language:
-                    #     warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
-                    #     return warnings  # Return the warning and stop further processing
-                    
-                    # Translate the text to the destination language
-                    translation = await self.translate_client.translate_text(alltext, dest_language)
-                    alltext = ""
+                # # Compare detected language with the user's selected source language
+                # if detected_language != src_language:
+                #     warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
+                #     return warnings  # Return the warning and stop further processing
 
-                    # Handle text formatting and add it to the Word document
-                    font_name = span["font"]
-                    font_size = span["size"]
+                # Translate the text to the destination language
+                translations = await self.translate_client.translate_batch(
+                    [text for text, _, _ in records], dest_language
+                )
 
+                for (_, font_name, font_size), translation in zip(records, translations):
+                    # Handle text formatting and add it to the Word document
                     p = document.add_paragraph()
                     run = p.add_run(translation)
                     run.font.name = font_name
                     run.font.size = Pt(font_size)
 
+                if progress:
+                    progress("translate", stop, page_count)
+        finally:
+            # Never close the document under a running extraction thread
+            if pending is not None:
+                await asyncio.gather(pending, return_exceptions=True)
+            doc.close()
+
         document.save(output_path)
         
         # If no warnings, return an empty list (indicating no issues)
         return warnings
 
-    async def process_file(self, input_path: str, src_language: str, dest_language: str):
-        """Determine file type, detect language, and process accordingly."""
-        output_path = f"{src_language}-{dest_language}_{int(time.time())}.docx"
+    def ingest_results(self, input_path: str, output_path: str, progress=None):
+        """Upload and index the source PDF and its translation; returns (input_url, output_url)."""
+        es = get_elasticsearch_service()
+        input_url = es.ingest_document(input_path, "pdf")
+        if progress:
+            progress("ingest", 1, 2)
+        output_url = es.ingest_document(output_path, "translated_docx", source="translated")
+        es.refresh_index()
+        if progress:
+            progress("ingest", 2, 2)
+        return input_url, output_url
+
+    async def process_file(self, input_path: str, src_language: str, dest_language: str, progress=None, ingest: bool = True):
+        """Determine file type, detect language, and process accordingly.
+
+        `progress(stage, done, total)` is called as the work advances, if given.
+        With `ingest=False` only the local translation is produced and the caller
+        is responsible for `ingest_results`.
+        """
+        output_path = f"{src_language}-{dest_language}_{int(time.time())}_{uuid.uuid4().hex[:8]}.docx"
         output_path = os.path.join(os.getcwd(), "backend/misc", output_path)
         if input_path.endswith('.pdf'):
-            warnings = await self.translate_pdf(input_path, output_path, src_language, dest_language)
+            warnings = await self.translate_pdf(input_path, output_path, src_language, dest_language, progress)
             
             if warnings:
                 return {"error": warnings}
 
-            es = ElasticSearchService()
-            input_url = es.ingest_document(input_path, "pdf")
-            output_url = es.ingest_document(output_path, "translated_docx")
+            if not ingest:
+                return {"local_path": output_path}
+
+            if progress:
+                progress("ingest", 0, 2)
+            input_url, output_url = await asyncio.to_thread(self.ingest_results, input_path, output_path, progress)
             return {   
                 "local_path":  output_path,
                 "orig_url":    input_url,
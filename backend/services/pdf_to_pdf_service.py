@@ -1,28 +1,149 @@
 import pymupdf
-from .translate_client import TranslateClient
+from .translate_client import get_translate_client
 from ..services.language_detection_service import LanguageDetectionService
-from ..services.elasticsearch_service import ElasticSearchService
+from .registry import get_elasticsearch_service
+from ..config.config import PDF_WORKERS, PDF_MIN_PAGES_PER_SHARD
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import math
+import multiprocessing
+import re
 import time
+import uuid
 import os
 
+TEXTFLAGS = pymupdf.TEXT_DEHYPHENATE
+
+_executor = None
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Process pool shared by every PDF job; created on first use."""
+    global _executor
+    if _executor is None:
+        # Forking a process that runs threads (uvicorn, the job workers) can copy a held
+        # lock into the child and deadlock it; spawned workers start from a clean interpreter
+        _executor = ProcessPoolExecutor(
+            max_workers=max(1, PDF_WORKERS),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_pdf_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def shard_pages(page_count: int, workers: int = PDF_WORKERS, min_pages: int = PDF_MIN_PAGES_PER_SHARD):
+    """Split `page_count` pages into contiguous (start, stop) ranges, one per worker at most."""
+    size = max(min_pages, math.ceil(page_count / max(1, workers)), 1)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def extract_page_blocks(input_path: str, start: int, stop: int):
+    """Return the (bbox, text) text blocks of pages [start, stop). Runs in a worker process."""
+    doc = pymupdf.open(input_path)
+    try:
+        return [
+            [(tuple(block[:4]), block[4]) for block in doc[page_num].get_text("blocks", flags=TEXTFLAGS)]
+            for page_num in range(start, stop)
+        ]
+    finally:
+        doc.close()
+
+
+def render_page_shard(input_path: str, shard_path: str, start: int, stop: int, dest_language: str, page_blocks):
+    """Draw translated blocks over pages [start, stop) and save them as a standalone PDF.
+
+    `page_blocks` holds one list of (bbox, src_text, dest_text) per page. Runs in a worker process.
+    """
+    doc = pymupdf.open(input_path)
+    doc.select(list(range(start, stop)))
+    ocg_xref = doc.add_ocg(dest_language, on=True)
+    WHITE = pymupdf.pdfcolor["white"]
+
+    for page, blocks in zip(doc, page_blocks):
+        for bbox, src_text, dest_text in blocks:
+            if isinstance(dest_text, str) and dest_text.strip():
+                page.draw_rect(bbox, color=None, fill=WHITE, oc=ocg_xref)
+                try:
+                    page.insert_htmlbox(bbox, dest_text, oc=ocg_xref)
+                except ValueError:
+                    print(f"Skipping invalid text block: {src_text}")
+
+    doc.save(shard_path)
+    doc.close()
+    return shard_path
+
+
+def merge_page_shards(shard_paths, output_path: str, dest_language: str):
+    """Concatenate rendered shards into `output_path` with a single translation layer."""
+    merged = pymupdf.open()
+    for shard_path in shard_paths:
+        with pymupdf.open(shard_path) as shard:
+            merged.insert_pdf(shard)
+
+    # insert_pdf copies each shard's layer as an unregistered OCG, so point every
+    # reference at one registered layer; the old copies are dropped on save
+    old_ocgs = [
+        xref for xref in range(1, merged.xref_length())
+        if merged.xref_get_key(xref, "Type") == ("name", "/OCG")
+    ]
+    if old_ocgs:
+        ocg_xref = merged.add_ocg(dest_language, on=True)
+        ref_re = re.compile(r"\b(?:%s) 0 R\b" % "|".join(map(str, old_ocgs)))
+        for xref in range(1, merged.xref_length()):
+            if xref == ocg_xref or xref in old_ocgs:
+                continue
+            for key in merged.xref_get_keys(xref):
+                kind, value = merged.xref_get_key(xref, key)
+                if kind in ("xref", "array", "dict") and ref_re.search(value):
+                    merged.xref_set_key(xref, key, ref_re.sub(f"{ocg_xref} 0 R", value))
+
+    merged.save(output_path, garbage=2)
+    merged.close()
+
 class PdfToPdfTranslationService:
     def __init__(self):
-        self.translate_client = TranslateClient()
+        self.translate_client = get_translate_client()
         self.language_service = LanguageDetectionService()
     
-    async def process_file(self, input_path: str, src_language: str, dest_language: str):
-        """Determine file type, detect language, and process accordingly."""
-        output_filename = f"{src_language}-{dest_language}_{int(time.time())}.pdf"
+    def ingest_results(self, input_path: str, output_path: str, progress=None):
+        """Upload and index the source PDF and its translation; returns (input_url, output_url)."""
+        es = get_elasticsearch_service()
+        input_url = es.ingest_document(input_path, "pdf")
+        if progress:
+            progress("ingest", 1, 2)
+        output_url = es.ingest_document(output_path, "translated_pdf", source="translated")
+        es.refresh_index()
+        if progress:
+            progress("ingest", 2, 2)
+        return input_url, output_url
+
+    async def process_file(self, input_path: str, src_language: str, dest_language: str, progress=None, ingest: bool = True):
+        """Determine file type, detect language, and process accordingly.
+
+        `progress(stage, done, total)` is called as the work advances, if given.
+        With `ingest=False` only the local translation is produced and the caller
+        is responsible for `ingest_results`.
+        """
+        output_filename = f"{src_language}-{dest_language}_{int(time.time())}_{uuid.uuid4().hex[:8]}.pdf"
         output_path = os.path.join(os.getcwd(), "backend/misc", output_filename)
         if input_path.endswith('.pdf'):
-            warnings = await self.translate_pdf(input_path, output_path, src_language, dest_language)
+            warnings = await self.translate_pdf(input_path, output_path, src_language, dest_language, progress)
             
             if warnings:
                 return {"error": warnings}
 
-            es = ElasticSearchService()
-            input_url = es.ingest_document(input_path, "pdf")
-            output_url = es.ingest_document(output_path, "translated_pdf")
+            if not ingest:
+                return {"local_path": output_path}
+
+            if progress:
+                progress("ingest", 0, 2)
+            input_url, output_url = await asyncio.to_thread(self.ingest_results, input_path, output_path, progress)
 
             return {
                 "local_path": output_path,
@@ -32,35 +153,66 @@ class PdfToPdfTranslationService:
         else:
             raise ValueError("Unsupported file format.")
 
-    async def translate_pdf(self, input_path: str, output_path: str, src_language: str, dest_language: str):
-        doc = pymupdf.open(input_path)
-        ocg_xref = doc.add_ocg(dest_language, on=True)
-        textflags = pymupdf.TEXT_DEHYPHENATE
-        WHITE = pymupdf.pdfcolor["white"]
+    async def translate_pdf(self, input_path: str, output_path: str, src_language: str, dest_language: str, progress=None):
+        """Translate a PDF in page shards.
+
+        Text blocks are extracted from every shard in the process pool, translated
+        concurrently in batches, drawn back onto each shard in parallel and the
+        shards are merged into `output_path`.
+        """
+        loop = asyncio.get_running_loop()
+        executor = get_pdf_executor()
         warnings = []
 
-        for page in doc:
-            blocks = page.get_text("blocks", flags=textflags)
+        with pymupdf.open(input_path) as doc:
+            page_count = len(doc)
+        shards = shard_pages(page_count)
+        pages_done = {"extract": 0, "render": 0}
+
+        async def run_shard(stage, func, start, stop, *args):
+            result = await loop.run_in_executor(executor, func, *args)
+            pages_done[stage] += stop - start
+            if progress:
+                progress(stage, pages_done[stage], page_count)
+            return result
+
+        shard_blocks = await asyncio.gather(*(
+            run_shard("extract", extract_page_blocks, start, stop, input_path, start, stop)
+            for start, stop in shards
+        ))
+        page_blocks = [blocks for pages in shard_blocks for blocks in pages]
+
+        # detected_language = await self.language_service.detect_language(src_text)
 
-            for block in blocks:
-                bbox = block[:4]
-                src_text = block[4]
+        # if detected_language != src_language:
+        #     warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
+        #     return warnings  # Return the warning and stop further processing
 
-                # detected_language = await self.language_service.detect_language(src_text)
+        src_texts = [src_text for blocks in page_blocks for _, src_text in blocks]
+        if progress:
+            progress("translate", 0, len(src_texts))
+        translations = iter(await self.translate_client.translate_batch(src_texts, dest_language))
+        if progress:
+            progress("translate", len(src_texts), len(src_texts))
+        translated_pages = [
+            [(bbox, src_text, next(translations) or "Translation Error") for bbox, src_text in blocks]
+            for blocks in page_blocks
+        ]
 
-                # if detected_language != src_language:
-                #     warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
-                #     return warnings  # Return the warning and stop further processing
-                
-                translation = await self.translate_client.translate_text(src_text, dest_language)
-                dest_text = translation if translation else "Translation Error"
+        shard_paths = [f"{output_path}.part{index}" for index in range(len(shards))]
+        try:
+            await asyncio.gather(*(
+                run_shard(
+                    "render", render_page_shard, start, stop,
+                    input_path, shard_path, start, stop, dest_language, translated_pages[start:stop],
+                )
+                for shard_path, (start, stop) in zip(shard_paths, shards)
+            ))
 
-                if isinstance(dest_text, str) and dest_text.strip():
-                    page.draw_rect(bbox, color=None, fill=WHITE, oc=ocg_xref)
-                    try:
-                        page.insert_htmlbox(bbox, dest_text, oc=ocg_xref)
-                    except ValueError:
-                        print(f"Skipping invalid text block: {src_text}")
+            await loop.run_in_executor(executor, merge_page_shards, shard_paths, output_path, dest_language)
+        finally:
+            for shard_path in shard_paths:
+                if os.path.exists(shard_path):
+                    os.unlink(shard_path)
 
-        doc.save(output_path)
         return warnings
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+from ..config.config import EMBEDDING_MODEL_NAME
+
+
+def _rss_bytes():
+    """Resident set size of this process, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _parameter_bytes(instance):
+    """Bytes held by the parameters and buffers of a torch module, if it is one."""
+    if not hasattr(instance, "parameters"):
+        return None
+    tensors = list(instance.parameters())
+    if hasattr(instance, "buffers"):
+        tensors += list(instance.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ServiceRegistry:
+    """Process-wide home for heavy models and clients.
+
+    Each entry is built by its factory on first use and then shared by every
+    request. Load time and memory are recorded per entry.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._stats = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory, kind: str = "service"):
+        self._factories[name] = (factory, kind)
+
+    def get(self, name: str):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                factory, kind = self._factories[name]
+                rss_before = _rss_bytes()
+                started = time.perf_counter()
+                instance = factory()
+                rss_after = _rss_bytes()
+                self._instances[name] = instance
+                self._stats[name] = {
+                    "kind": kind,
+                    "load_seconds": round(time.perf_counter() - started, 3),
+                    "parameter_bytes": _parameter_bytes(instance),
+                    "rss_delta_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                }
+            return self._instances[name]
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "process_rss_bytes": _rss_bytes(),
+                "entries": {
+                    name: {"loaded": name in self._instances, **self._stats.get(name, {"kind": kind})}
+                    for name, (_, kind) in self._factories.items()
+                },
+            }
+
+
+registry = ServiceRegistry()
+
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)  # light-weight embedded model, k can gpu
+
+
+def _load_elasticsearch_service():
+    from .elasticsearch_service import ElasticSearchService
+    return ElasticSearchService()
+
+
+def _load_gcs_service():
+    from .gcs_upload_service import GCSFileUploadService
+    return GCSFileUploadService()
+
+
+registry.register("embedding_model", _load_embedding_model, kind="model")
+registry.register("elasticsearch_service", _load_elasticsearch_service)
+registry.register("gcs_service", _load_gcs_service)
+
+
+# The getters below double as FastAPI dependencies
+def get_embedding_model():
+    return registry.get("embedding_model")
+
+
+def get_elasticsearch_service():
+    return registry.get("elasticsearch_service")
+
+
+def get_gcs_service():
+    return registry.get("gcs_service")
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config.config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_AGE_DAYS
+from ..models.file import File
+from ..models.translation_result import TranslationResult
+from .registry import get_gcs_service
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def cache_key(content_hash: str, src_language: str, dest_language: str, dest_file: str) -> dict:
+    return {
+        "content_hash": content_hash,
+        "src_language": src_language.lower(),
+        "dest_language": dest_language.lower(),
+        "dest_file": dest_file,
+    }
+
+
+async def find_cached_result_async(db: AsyncSession, key: dict) -> Optional[TranslationResult]:
+    """Return the cached translation for `key` if its artifact is still usable."""
+    cached = (await db.execute(select(TranslationResult).filter_by(**key).limit(1))).scalar()
+    if cached is None:
+        return None
+    if os.path.exists(cached.artifact_path):
+        touch_artifact(cached.artifact_path)
+        return cached
+    if cached.file_id is not None and (await db.execute(select(File.id).where(File.id == cached.file_id))).first():
+        return cached
+    # Neither the local artifact nor the translated file record exists any more
+    await db.delete(cached)
+    await db.commit()
+    return None
+
+
+async def cached_file_url_async(db: AsyncSession, cached: TranslationResult) -> Optional[str]:
+    if cached.file_id is None:
+        return None
+    return (await db.execute(select(File.file_path).where(File.id == cached.file_id))).scalar()
+
+
+def store_artifact(local_path: str, key: dict) -> str:
+    """Keep a copy of a translated file under RESULT_CACHE_DIR and return its path.
+
+    A hard link is used when possible so no bytes are copied.
+    """
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    ext = os.path.splitext(local_path)[1]
+    name = f"{key['content_hash']}_{key['src_language']}-{key['dest_language']}{ext}"
+    artifact_path = os.path.join(RESULT_CACHE_DIR, name)
+    if os.path.exists(artifact_path):
+        os.unlink(artifact_path)
+    try:
+        os.link(local_path, artifact_path)
+    except OSError:
+        shutil.copyfile(local_path, artifact_path)
+    touch_artifact(artifact_path)
+    evict_artifacts(keep=artifact_path)
+    return artifact_path
+
+
+def restore_artifact(url: str, artifact_path: str) -> bool:
+    """Download an evicted artifact back from GCS; False when that is not possible."""
+    os.makedirs(RESULT_CACHE_DIR, exist_ok=True)
+    # A private partial file, so concurrent hits on the same result don't clobber each other
+    fd, partial_path = tempfile.mkstemp(dir=RESULT_CACHE_DIR, suffix=".part")
+    os.close(fd)
+    try:
+        found = get_gcs_service().download_file(url, partial_path)
+    except Exception as e:
+        print(f"Could not restore {artifact_path} from GCS: {e}")
+        found = False
+    if not found:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        return False
+    os.replace(partial_path, artifact_path)
+    touch_artifact(artifact_path)
+    evict_artifacts(keep=artifact_path)
+    return True
+
+
+def touch_artifact(path: str) -> None:
+    """Mark an artifact as recently used; eviction goes by modification time."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_artifacts(max_bytes: int = RESULT_CACHE_MAX_BYTES, max_age_days: float = RESULT_CACHE_MAX_AGE_DAYS,
+                    keep: str = None) -> int:
+    """Delete artifacts older than `max_age_days`, then the least recently used ones until
+    the cache fits in `max_bytes`. Returns the number of files removed.
+
+    The TranslationResult rows stay: without the artifact a hit fetches the
+    translated file back from GCS.
+    """
+    entries = []
+    try:
+        with os.scandir(RESULT_CACHE_DIR) as it:
+            for entry in it:
+                # Skip downloads still in progress in restore_artifact
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        return 0
+
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    cutoff = time.time() - max_age_days * 86400 if max_age_days > 0 else None
+    removed = 0
+    for mtime, size, path in entries:
+        if path == keep:
+            continue
+        if total <= max_bytes and (cutoff is None or mtime >= cutoff):
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def discard_cached_results(db: Session, file_id: int) -> list:
+    """Delete the cached translations that point at File `file_id`, in the caller's transaction.
+
+    Returns their artifact paths, to be removed with `remove_artifacts` once committed.
+    """
+    cached = db.query(TranslationResult).filter(TranslationResult.file_id == file_id).all()
+    for result in cached:
+        db.delete(result)
+    return [result.artifact_path for result in cached]
+
+
+def remove_artifacts(paths: list) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def save_cached_result(db: Session, key: dict, artifact_path: str, file_id: Optional[int]) -> None:
+    try:
+        db.add(TranslationResult(**key, artifact_path=artifact_path, file_id=file_id))
+        db.commit()
+    except IntegrityError:
+        # The same document was translated concurrently; the first result wins
+        db.rollback()
@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from ..config.config import (
+    SEARCH_CACHE_ENABLED,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_SIZE,
+    SEARCH_GENERATION_PATH,
+    SEARCH_FACET_CACHE_TTL,
+)
+from .sqlite_store import SQLiteStore
+
+
+class GenerationStore(SQLiteStore):
+    """Named counters in a SQLite file shared by every worker.
+
+    Writers bump a counter; caches compare the value they stored an entry
+    under with the current one to know whether the entry is stale.
+    """
+
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",)
+
+    def __init__(self, path: str = SEARCH_GENERATION_PATH):
+        super().__init__(path)
+
+    def get(self, name: str) -> int:
+        with self.lock:
+            row = self.connection().execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name: str) -> int:
+        with self.lock:
+            conn = self.connection()
+            conn.execute(
+                "INSERT INTO generations (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            conn.commit()
+            return conn.execute("SELECT value FROM generations WHERE name = ?", (name,)).fetchone()[0]
+
+
+class SearchCache:
+    """In-process TTL + LRU cache of search responses, invalidated by the `files` generation."""
+
+    GENERATION = "files"
+
+    def __init__(self, generations: GenerationStore = None, ttl: float = SEARCH_CACHE_TTL,
+                 max_entries: int = SEARCH_CACHE_SIZE, enabled: bool = SEARCH_CACHE_ENABLED):
+        self.generations = generations or GenerationStore()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+
+    def generation(self) -> int:
+        return self.generations.get(self.GENERATION)
+
+    def get(self, key: str, generation: int):
+        """Return the cached value for `key` if it is fresh and from `generation`, else None."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, entry_generation, value = entry
+            if entry_generation != generation:
+                del self.entries[key]
+                self.invalidated += 1
+                self.misses += 1
+                return None
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, generation: int, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self) -> int:
+        """Mark every cached search, in every worker, as stale."""
+        with self.lock:
+            self.entries.clear()
+        return self.generations.bump(self.GENERATION)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self.entries),
+                "generation": self.generation(),
+                "ttl_seconds": self.ttl,
+            }
+
+
+search_cache = SearchCache()
+# Unfiltered facet counts for the dashboard; shares the generation counter with search_cache
+facet_cache = SearchCache(generations=search_cache.generations, ttl=SEARCH_FACET_CACHE_TTL, max_entries=1)
+
+
+def invalidate_search_cache():
+    """Call after files are added to or removed from the index or the files table."""
+    try:
+        search_cache.invalidate()
+    except sqlite3.Error as e:
+        # Cached results then age out through the TTL
+        print(f"Search cache invalidation failed: {e}")
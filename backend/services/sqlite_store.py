@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Stay well below SQLite's limit on bound parameters per statement
+SQLITE_MAX_VARIABLES = 500
+
+
+class SQLiteStore:
+    """A local SQLite file shared by every uvicorn worker.
+
+    The file runs in WAL mode so workers can read while one writes. Each
+    process keeps one connection, used under `self.lock`. Subclasses list
+    their CREATE statements in SCHEMA.
+    """
+
+    SCHEMA = ()
+    PRAGMAS = ("journal_mode=WAL",)
+    ROW_FACTORY = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def connection(self) -> sqlite3.Connection:
+        """The connection for this process; call with `self.lock` held."""
+        # Connections must not cross a fork, so reopen when running in a new worker
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            if self.ROW_FACTORY is not None:
+                conn.row_factory = self.ROW_FACTORY
+            for pragma in self.PRAGMAS:
+                conn.execute(f"PRAGMA {pragma}")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def select_in(conn: sqlite3.Connection, query: str, values: list, params: tuple = ()) -> list:
+        """Run `query` with `{}` replaced by an IN list over `values`, in chunks; returns all rows."""
+        rows = []
+        for start in range(0, len(values), SQLITE_MAX_VARIABLES):
+            chunk = values[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(conn.execute(query.format(placeholders), (*params, *chunk)).fetchall())
+        return rows
+
+
+class TieredCache(SQLiteStore):
+    """Two-tier cache: an in-process LRU in front of a table in a shared SQLite file.
+
+    Subclasses implement `_fetch` and `_write` for their table; keys must be
+    hashable and are used as-is in the LRU.
+    """
+
+    PRAGMAS = ("journal_mode=WAL", "synchronous=NORMAL")
+
+    def __init__(self, path: str, lru_size: int):
+        super().__init__(path)
+        self.lru_size = lru_size
+        self.lru = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _fetch(self, conn: sqlite3.Connection, keys: list):
+        """Yield (key, value) for each of `keys` found on disk."""
+        raise NotImplementedError
+
+    def _write(self, conn: sqlite3.Connection, entries: list):
+        """Insert or replace the (key, value) `entries` on disk."""
+        raise NotImplementedError
+
+    def _remember(self, key, value):
+        self.lru[key] = value
+        self.lru.move_to_end(key)
+        while len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def lookup(self, keys: list) -> list:
+        """Return the cached value for each key, or None on a miss."""
+        results = [None] * len(keys)
+        missing = {}
+
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.lru:
+                    self.lru.move_to_end(key)
+                    results[i] = self.lru[key]
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing:
+                for key, value in self._fetch(self.connection(), list(missing)):
+                    self._remember(key, value)
+                    for i in missing.pop(key):
+                        results[i] = value
+                        self.disk_hits += 1
+
+                self.misses += sum(len(indices) for indices in missing.values())
+
+        return results
+
+    def store(self, entries: list):
+        """Cache the (key, value) `entries` in memory and on disk."""
+        if not entries:
+            return
+        with self.lock:
+            for key, value in entries:
+                self._remember(key, value)
+            conn = self.connection()
+            self._write(conn, entries)
+            conn.commit()
+            self.writes += len(entries)
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "lru_entries": len(self.lru),
+            }
@@ -0,0 +1,82 @@
+import re
+
+PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n\s*")
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?;:。！？])[\"')\]]*\s+")
+WORD_BREAK_RE = re.compile(r"\s+")
+
+
+def _last_break(pattern: re.Pattern, window: str, min_end: int) -> int:
+    """Return the end offset of the last `pattern` match in `window`, or -1."""
+    end = -1
+    for match in pattern.finditer(window):
+        if match.end() >= min_end:
+            end = match.end()
+    return end
+
+
+def iter_chunks(text: str, max_chars: int):
+    """Yield consecutive slices of `text` of at most `max_chars` characters.
+
+    Cuts are made after a paragraph break if possible, then after a sentence,
+    then between words, and only as a last resort in the middle of a word.
+    The separator stays with the preceding chunk, so `"".join(chunks) == text`.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    start = 0
+    length = len(text)
+    # Avoid tiny chunks: a boundary in the first quarter of the window is ignored
+    min_end = max_chars // 4
+
+    while length - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = -1
+        for pattern in (PARAGRAPH_BREAK_RE, SENTENCE_BREAK_RE, WORD_BREAK_RE):
+            cut = _last_break(pattern, window, min_end)
+            if cut > 0:
+                break
+        if cut <= 0:
+            cut = max_chars
+        yield text[start:start + cut]
+        start += cut
+
+    if start < length:
+        yield text[start:]
+
+
+def iter_passages(text: str, size: int, overlap: int):
+    """Yield (offset, passage) pairs of at most `size` characters for indexing.
+
+    Passages follow the `iter_chunks` boundaries and each one also repeats up to
+    `overlap` characters from the end of the previous chunk, starting at a word,
+    so text cut at a boundary still appears whole in one passage. Text with no
+    spaces in the overlap window (CJK, for instance) overlaps by characters.
+    """
+    if not 0 <= overlap < size:
+        raise ValueError("overlap must be smaller than size")
+
+    start = 0
+    previous = ""
+    for chunk in iter_chunks(text, size - overlap):
+        tail = previous[-overlap:] if overlap else ""
+        if len(previous) > overlap:
+            match = WORD_BREAK_RE.search(tail)
+            if match:
+                tail = tail[match.end():]
+        raw = tail + chunk
+        passage = raw.strip()
+        if passage:
+            yield start - len(tail) + len(raw) - len(raw.lstrip()), passage
+        start += len(chunk)
+        previous = chunk
+
+
+def split_padding(chunk: str):
+    """Split a chunk into (leading whitespace, content, trailing whitespace)."""
+    content = chunk.strip()
+    if not content:
+        return chunk, "", ""
+    lead = chunk[:len(chunk) - len(chunk.lstrip())]
+    trail = chunk[len(chunk.rstrip()):]
+    return lead, content, trail
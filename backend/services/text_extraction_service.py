@@ -0,0 +1,149 @@
+import os
+import re
+from datetime import datetime
+
+import pymupdf
+from docx import Document
+
+from ..config.config import INDEX_MAX_CHARS
+
+PDF_DATE_RE = re.compile(r"^D:(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?")
+
+
+class TextCollector:
+    """Accumulates text pieces and stops once `max_chars` have been kept."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.truncated = False
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+
+    def add(self, text: str):
+        if not text or self.full:
+            if text:
+                self.truncated = True
+            return
+        remaining = self.max_chars - self.length
+        if len(text) > remaining:
+            text = text[:remaining]
+            self.truncated = True
+        self.parts.append(text)
+        self.length += len(text)
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+def parse_pdf_date(value: str):
+    """Convert a PDF date such as `D:20240131120000+07'00'` to ISO 8601, or None."""
+    match = PDF_DATE_RE.match(value or "")
+    if not match:
+        return None
+    year, month, day, hour, minute, second = (int(part) if part else None for part in match.groups())
+    try:
+        return datetime(year, month or 1, day or 1, hour or 0, minute or 0, second or 0).isoformat()
+    except ValueError:
+        return None
+
+
+def extract_pdf(path: str, collector: TextCollector) -> dict:
+    with pymupdf.open(path) as doc:
+        # Pages are loaded one at a time, so only the current page is held in memory
+        for page in doc:
+            collector.add(page.get_text("text"))
+            if collector.full:
+                collector.truncated = collector.truncated or page.number < doc.page_count - 1
+                break
+        metadata = doc.metadata or {}
+        return {
+            "title": metadata.get("title") or None,
+            "date": parse_pdf_date(metadata.get("creationDate")),
+        }
+
+
+def extract_docx(path: str, collector: TextCollector) -> dict:
+    doc = Document(path)
+    for para in doc.paragraphs:
+        collector.add(para.text + "\n")
+        if collector.full:
+            break
+    for table in doc.tables:
+        if collector.full:
+            break
+        for row in table.rows:
+            collector.add("\t".join(cell.text for cell in row.cells) + "\n")
+            if collector.full:
+                break
+
+    properties = doc.core_properties
+    return {
+        "title": properties.title or None,
+        "date": properties.created.isoformat() if properties.created else None,
+    }
+
+
+def extract_xlsx(path: str, collector: TextCollector) -> dict:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        # openpyxl is optional; the file is still stored and searchable by name
+        return {}
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                collector.add("\t".join("" if value is None else str(value) for value in row) + "\n")
+                if collector.full:
+                    return {}
+    finally:
+        workbook.close()
+    return {}
+
+
+def extract_plain(path: str, collector: TextCollector) -> dict:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while not collector.full:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            collector.add(chunk)
+    return {}
+
+
+EXTRACTORS = {
+    ".pdf": extract_pdf,
+    ".docx": extract_docx,
+    ".xlsx": extract_xlsx,
+    ".txt": extract_plain,
+    ".md": extract_plain,
+    ".csv": extract_plain,
+}
+
+
+def extract_attachment(path: str, max_chars: int = INDEX_MAX_CHARS) -> dict:
+    """Extract up to `max_chars` of text from a local file.
+
+    Returns the same shape the ES attachment processor produced
+    (`content`, `title`, `date`, `content_length`), so existing queries
+    on `attachment.content` keep working. Files without an extractor, or
+    that fail to parse, are indexed with empty content.
+    """
+    collector = TextCollector(max_chars)
+    extractor = EXTRACTORS.get(os.path.splitext(path)[1].lower())
+    metadata = {}
+    if extractor is not None:
+        try:
+            metadata = extractor(path, collector)
+        except Exception as e:
+            print(f"Text extraction failed for {path}: {e}")
+
+    content = collector.text()
+    attachment = {"content": content, "content_length": len(content), "truncated": collector.truncated}
+    attachment.update({key: value for key, value in metadata.items() if value})
+    return attachment
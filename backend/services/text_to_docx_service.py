@@ -3,9 +3,10 @@ import os
 import time
 from docx import Document
 from ..services.elasticsearch_service import ElasticSearchService
+from .registry import get_elasticsearch_service
 
 class TextToDocService:
-    def save_text_as_doc(self, text: str) -> str:
+    def save_text_as_doc(self, text: str, es: ElasticSearchService = None) -> str:
         """Generate a .docx file from text and return the file path."""
         file_name = f"Generated_Doc_{int(time.time())}.docx"
         file_path = os.path.join(os.getcwd(), "backend/misc", file_name)
@@ -13,7 +14,8 @@ class TextToDocService:
         doc.add_paragraph(text)
         doc.save(file_path)
     
-        es = ElasticSearchService()
-        gcs_url = es.ingest_document(file_path, "docx")
+        es = es or get_elasticsearch_service()
+        gcs_url = es.ingest_document(file_path, "docx", source="generated")
+        es.refresh_index()
         
         return file_path, gcs_url
@@ -1,14 +1,20 @@
-from .translate_client import TranslateClient
+import asyncio
+from collections import deque
+from .translate_client import get_translate_client, MAX_CHARS_PER_REQUEST
+from .text_chunker import iter_chunks, split_padding
 from fastapi import HTTPException
-from typing import List
+from typing import AsyncIterator, List
+from ..config.config import TRANSLATE_CHUNK_CONCURRENCY
 from ..services.language_detection_service import LanguageDetectionService
 from googletrans import Translator, LANGUAGES
 
 class TranslationService:
-    def __init__(self):
-        self.translate_client = TranslateClient()
+    MAX_CHARS_PER_REQUEST = MAX_CHARS_PER_REQUEST
+
+    def __init__(self, chunk_concurrency: int = TRANSLATE_CHUNK_CONCURRENCY):
+        self.translate_client = get_translate_client()
         self.language_service = LanguageDetectionService()
-        self.MAX_CHARS_PER_REQUEST = 5000
+        self.chunk_concurrency = max(1, chunk_concurrency)
 
     def validate_language_code(self, lang_code: str) -> str:
         """Validate and normalize language code."""
@@ -30,16 +36,75 @@ class TranslationService:
         
         return lang_code
 
-    async def translate(self, src_text: str, source_lang: str, dest_lang: str) -> str:
-        warnings = []
-
+    async def check_source_language(self, src_text: str, source_lang: str) -> List[str]:
+        """Return a warning if the detected language differs from the selected one."""
         detected_language = await self.language_service.detect_language(src_text)
         # Compare detected language with the user's selected source language
+        if detected_language != source_lang:
+            return [f"Warning: Detected language is {detected_language}, but the selected language is {source_lang}."]
+        return []
+
+    async def _translate_chunk(self, chunk: str, source_lang: str, dest_lang: str) -> str:
+        lead, content, trail = split_padding(chunk)
+        if not content:
+            return chunk
+        translation = await self.translate_client.translate_text(content, dest_lang, source=source_lang)
+        return f"{lead}{translation}{trail}"
+
+    async def translate_stream(self, src_text: str, source_lang: str, dest_lang: str) -> AsyncIterator[str]:
+        """Translate `src_text` chunk by chunk and yield the translations in order.
+
+        The text is cut on paragraph and sentence boundaries under
+        MAX_CHARS_PER_REQUEST, up to `chunk_concurrency` chunks are in flight at
+        once, and the whitespace around each chunk is kept as in the source.
+        """
+        in_flight = deque()
+        try:
+            for chunk in iter_chunks(src_text, self.MAX_CHARS_PER_REQUEST):
+                in_flight.append(asyncio.create_task(self._translate_chunk(chunk, source_lang, dest_lang)))
+                if len(in_flight) >= self.chunk_concurrency:
+                    yield await in_flight.popleft()
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def detect_and_translate(self, src_text: str, source_lang: str, dest_lang: str):
+        """Translate and detect the source language with one API call per chunk.
+
+        Returns (translated text, detected language, warnings). A language mismatch
+        is reported as a warning next to the translation instead of stopping it.
+        """
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def translate_chunk(chunk: str):
+            lead, content, trail = split_padding(chunk)
+            if not content:
+                return chunk, None
+            async with semaphore:
+                translation, detected = await self.translate_client.translate_text_detect(content, dest_lang)
+            return f"{lead}{translation}{trail}", detected
+
+        results = await asyncio.gather(*(
+            translate_chunk(chunk) for chunk in iter_chunks(src_text, self.MAX_CHARS_PER_REQUEST)
+        ))
+        detected_language = next((detected for _, detected in results if detected), None)
+
+        warnings = []
         if detected_language != source_lang:
             warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {source_lang}.")
+
+        translation = "".join(text for text, _ in results)
+        dest_text = translation if translation else "Translation Error"
+        return dest_text, detected_language, warnings
+
+    async def translate(self, src_text: str, source_lang: str, dest_lang: str) -> str:
+        warnings = await self.check_source_language(src_text, source_lang)
+        if warnings:
             return warnings  # Return the warning and stop further processing
 
-        translation = await self.translate_client.translate_text(src_text, dest_lang)
+        translation = "".join([chunk async for chunk in self.translate_stream(src_text, source_lang, dest_lang)])
         dest_text = translation if translation else "Translation Error"
         print(dest_text)
 
@@ -1,36 +1,262 @@
 # from google.cloud import translate_v2 as translate
-import requests
-import os
+import asyncio
 import html
-from ..config.config import GCP_API_KEY
+import random
+from urllib.parse import urlparse
+
+import httpx
+
+from ..config.config import (
+    GCP_API_KEY,
+    TRANSLATE_TIMEOUT,
+    TRANSLATE_CONNECT_TIMEOUT,
+    TRANSLATE_MAX_CONNECTIONS,
+    TRANSLATE_MAX_KEEPALIVE,
+    TRANSLATE_MAX_PER_HOST,
+    TRANSLATE_MAX_RETRIES,
+    TRANSLATE_BACKOFF_BASE,
+    TRANSLATE_BACKOFF_MAX,
+    TRANSLATION_MEMORY_ENABLED,
+)
+from .translation_memory_service import TranslationMemory
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Google recommends at most 5000 characters and accepts at most 128 `q` values per request
+MAX_CHARS_PER_REQUEST = 5000
+MAX_SEGMENTS_PER_REQUEST = 128
+
+
+def pack_batches(texts, max_chars: int = MAX_CHARS_PER_REQUEST, max_segments: int = MAX_SEGMENTS_PER_REQUEST):
+    """Group the indices of `texts` into batches that fit the character and segment budget.
+
+    A single text longer than `max_chars` is sent on its own.
+    """
+    batches = []
+    current = []
+    current_chars = 0
+    for index, text in enumerate(texts):
+        size = len(text)
+        if current and (current_chars + size > max_chars or len(current) >= max_segments):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(index)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
 
 class TranslateClient:
-    def __init__(self):
+    """Async Google Translate v2 client backed by one keep-alive connection pool."""
+
+    def __init__(
+        self,
+        timeout: float = TRANSLATE_TIMEOUT,
+        connect_timeout: float = TRANSLATE_CONNECT_TIMEOUT,
+        max_connections: int = TRANSLATE_MAX_CONNECTIONS,
+        max_keepalive: int = TRANSLATE_MAX_KEEPALIVE,
+        max_per_host: int = TRANSLATE_MAX_PER_HOST,
+        host_limits: dict = None,
+        max_retries: int = TRANSLATE_MAX_RETRIES,
+        backoff_base: float = TRANSLATE_BACKOFF_BASE,
+        backoff_max: float = TRANSLATE_BACKOFF_MAX,
+        memory: TranslationMemory = None,
+    ):
         self.endpoint = "https://translation.googleapis.com/language/translate/v2"
         self.api_key = GCP_API_KEY
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self.max_per_host = max_per_host
+        self.host_limits = host_limits or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.memory = memory
+        self._client = None
+        self._host_semaphores = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"Content-Type": "application/json"},
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_semaphores:
+            limit = self.host_limits.get(host, self.max_per_host)
+            self._host_semaphores[host] = asyncio.Semaphore(limit)
+        return self._host_semaphores[host]
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
 
-    async def translate_text(self, text: str, target: str):
+    async def _post(self, data: dict) -> dict:
+        url = self.endpoint
+        client = self._get_client()
+        semaphore = self._host_semaphore(url)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.post(url, params={"key": self.api_key}, json=data)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise Exception(f"Translation API error: {e}") from e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self._backoff(attempt)
+                await asyncio.sleep(min(delay, self.backoff_max))
+                continue
+
+            try:
+                response_data = response.json()
+            except ValueError:
+                response_data = response.text
+            if response.status_code == 200 and isinstance(response_data, dict) and "data" in response_data and "translations" in response_data["data"]:
+                return response_data
+            raise Exception(f"Translation API error: {response_data}")
+
+    async def translate_text(self, text: str, target: str, source: str = None):
         if isinstance(text, bytes):
             text = text.decode("utf-8")
 
-        # result = self.translate_client.translate(text, target_language=target)
-
-        # return html.unescape(result["translatedText"])
+        if self.memory is not None:
+            cached = await asyncio.to_thread(self.memory.get, text, source, target)
+            if cached is not None:
+                return cached
 
-        headers = {
-            "Content-Type": "application/json"
+        data = {
+            "q": text,
+            "target": target,
+            "format": "text",
         }
-        
+        if source:
+            data["source"] = source
+
+        response_data = await self._post(data)
+        translation = html.unescape(response_data["data"]["translations"][0]["translatedText"])
+
+        if self.memory is not None:
+            await asyncio.to_thread(self.memory.put, text, source, target, translation)
+        return translation
+
+    async def translate_text_detect(self, text: str, target: str):
+        """Translate with the source language auto-detected in the same request.
+
+        Returns (translation, detected source language).
+        """
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+
         data = {
             "q": text,
             "target": target,
             "format": "text",
         }
-        
-        response = requests.post(f"{self.endpoint}?key={self.api_key}", json=data, headers=headers)
-        response_data = response.json()
-        
-        if response.status_code == 200 and "data" in response_data and "translations" in response_data["data"]:
-            return html.unescape(response_data["data"]["translations"][0]["translatedText"])
-        else:
-            raise Exception(f"Translation API error: {response_data}")
\ No newline at end of file
+
+        response_data = await self._post(data)
+        result = response_data["data"]["translations"][0]
+        translation = html.unescape(result["translatedText"])
+        detected = result.get("detectedSourceLanguage")
+
+        # Later calls that name the source language can reuse this translation
+        if self.memory is not None and detected:
+            await asyncio.to_thread(self.memory.put, text, detected, target, translation)
+        return translation, detected
+
+    async def _translate_segments(self, segments: list, target: str, source: str = None) -> list:
+        data = {
+            "q": segments,
+            "target": target,
+            "format": "text",
+        }
+        if source:
+            data["source"] = source
+
+        response_data = await self._post(data)
+        translations = response_data["data"]["translations"]
+        if len(translations) != len(segments):
+            raise Exception(f"Translation API error: expected {len(segments)} translations, got {len(translations)}")
+        return [html.unescape(t["translatedText"]) for t in translations]
+
+    async def translate_batch(
+        self,
+        texts: list,
+        target: str,
+        source: str = None,
+        max_chars: int = MAX_CHARS_PER_REQUEST,
+        max_segments: int = MAX_SEGMENTS_PER_REQUEST,
+    ) -> list:
+        """Translate many segments with as few requests as possible.
+
+        Segments are packed into batches, the batches are sent concurrently and the
+        results are returned in the same order as `texts`. Blank segments are passed
+        through untouched, and segments found in the translation memory or repeated
+        within `texts` are not sent again.
+        """
+        texts = [t.decode("utf-8") if isinstance(t, bytes) else t for t in texts]
+        results = list(texts)
+        pending = [i for i, t in enumerate(texts) if t and t.strip()]
+
+        if self.memory is not None and pending:
+            # SQLite I/O (with a busy timeout) stays off the event loop
+            cached = await asyncio.to_thread(self.memory.get_many, [texts[i] for i in pending], source, target)
+            for i, translation in zip(pending, cached):
+                if translation is not None:
+                    results[i] = translation
+            pending = [i for i, translation in zip(pending, cached) if translation is None]
+
+        if not pending:
+            return results
+
+        # Repeated segments (headers, footers) are only sent once
+        unique = list(dict.fromkeys(texts[i] for i in pending))
+        batches = pack_batches(unique, max_chars, max_segments)
+        batch_results = await asyncio.gather(*(
+            self._translate_segments([unique[j] for j in batch], target, source)
+            for batch in batches
+        ))
+
+        translated = {}
+        for batch, translations in zip(batches, batch_results):
+            for j, translation in zip(batch, translations):
+                translated[unique[j]] = translation
+        for i in pending:
+            results[i] = translated[texts[i]]
+
+        if self.memory is not None:
+            await asyncio.to_thread(
+                self.memory.put_many, unique, source, target, [translated[text] for text in unique]
+            )
+        return results
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_semaphores = {}
+
+
+_shared_client = None
+
+
+def get_translate_client() -> TranslateClient:
+    """Return the process-wide TranslateClient so every service shares one pool."""
+    global _shared_client
+    if _shared_client is None:
+        memory = TranslationMemory() if TRANSLATION_MEMORY_ENABLED else None
+        _shared_client = TranslateClient(memory=memory)
+    return _shared_client
@@ -0,0 +1,79 @@
+import hashlib
+import re
+import time
+import unicodedata
+
+from ..config.config import TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_LRU_SIZE
+from .sqlite_store import TieredCache
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different copies share one entry."""
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationMemory(TieredCache):
+    """Two-tier translation cache: an in-process LRU backed by a SQLite file.
+
+    The SQLite file runs in WAL mode so several uvicorn workers can share it.
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS translations (
+            key TEXT PRIMARY KEY,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            translation TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+    )
+
+    def __init__(self, path: str = TRANSLATION_MEMORY_PATH, lru_size: int = TRANSLATION_MEMORY_LRU_SIZE):
+        super().__init__(path, lru_size)
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str) -> str:
+        raw = f"{source_lang or 'auto'}\x1f{target_lang}\x1f{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry_key(self, text: str, source_lang: str, target_lang: str) -> tuple:
+        # The languages ride along in the key so `_write` can fill their columns
+        return self.make_key(text, source_lang, target_lang), source_lang or "auto", target_lang
+
+    def _fetch(self, conn, keys):
+        rows = self.select_in(
+            conn,
+            "SELECT key, source_lang, target_lang, translation FROM translations WHERE key IN ({})",
+            [key for key, _, _ in keys],
+        )
+        for key, source_lang, target_lang, translation in rows:
+            yield (key, source_lang, target_lang), translation
+
+    def _write(self, conn, entries):
+        now = time.time()
+        conn.executemany(
+            "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+            [(key, source_lang, target_lang, translation, now)
+             for (key, source_lang, target_lang), translation in entries],
+        )
+
+    def get(self, text: str, source_lang: str, target_lang: str):
+        return self.get_many([text], source_lang, target_lang)[0]
+
+    def get_many(self, texts: list, source_lang: str, target_lang: str) -> list:
+        """Return the cached translation for each text, or None on a miss."""
+        return self.lookup([self._entry_key(text, source_lang, target_lang) for text in texts])
+
+    def put(self, text: str, source_lang: str, target_lang: str, translation: str):
+        self.put_many([text], source_lang, target_lang, [translation])
+
+    def put_many(self, texts: list, source_lang: str, target_lang: str, translations: list):
+        self.store([
+            (self._entry_key(text, source_lang, target_lang), translation)
+            for text, translation in zip(texts, translations)
+            if translation is not None
+        ])
@@ -1,21 +1,21 @@
 import moviepy as mp
 import speech_recognition as sr
-from .translate_client import TranslateClient
+from .translate_client import get_translate_client
 from docx import Document
+import asyncio
 import tempfile
 import os
 from ..services.language_detection_service import LanguageDetectionService
 
 class VideoTranslatorService:
     def __init__(self):
-        self.translate_client = TranslateClient()
+        self.translate_client = get_translate_client()
         self.recognizer = sr.Recognizer()
         self.language_service = LanguageDetectionService()
 
     async def translate_text(self, text: str, src_language: str, dest_language: str) -> str:
         """Translate the given text to the specified destination language."""
-        translation = await self.translator.translate(text, src=src_language, dest=dest_language)
-        return translation.text
+        return await self.translate_client.translate_text(text, dest_language)
 
     def extract_audio_from_video(self, video_path: str, audio_path: str):
         """Extract audio from the video file."""
@@ -51,36 +51,52 @@ class VideoTranslatorService:
 
     async def process_video_translation(self, file, src_language: str, dest_language: str):
         """Process video translation: extract audio, transcribe, detect language, and translate."""
-        warnings = []
-        
         # Create temporary files
         with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
             video_path = temp_video.name
             temp_video.write(await file.read())
 
+        return await self.process_video_file(video_path, src_language, dest_language)
+
+    async def process_video_file(self, video_path: str, src_language: str, dest_language: str, progress=None):
+        """Translate a video already on disk; the video file is removed afterwards.
+
+        The blocking audio extraction and transcription run in a thread.
+        `progress(stage, done, total)` is called as the work advances, if given.
+        """
+        warnings = []
         audio_path = video_path.replace(".mp4", ".wav")
         doc_path = video_path.replace(".mp4", ".docx")
-        
-        # Process video
-        self.extract_audio_from_video(video_path, audio_path)
 
-        src_text = self.transcribe_audio_to_text(audio_path)
+        try:
+            # Process video
+            if progress:
+                progress("extract_audio")
+            await asyncio.to_thread(self.extract_audio_from_video, video_path, audio_path)
+
+            if progress:
+                progress("transcribe")
+            src_text = await asyncio.to_thread(self.transcribe_audio_to_text, audio_path)
 
-        # Language detection
-        detected_language = await self.language_service.detect_language(src_text)
-        if detected_language != src_language:
-            warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
+            # Language detection
+            if progress:
+                progress("detect")
+            detected_language = await self.language_service.detect_language(src_text)
+            if detected_language != src_language:
+                warnings.append(f"Warning: Detected language is {detected_language}, but the selected language is {src_language}.")
+                return warnings, None
+
+            if progress:
+                progress("translate")
+            translation = await self.translate_client.translate_text(src_text, dest_language)
+
+            if progress:
+                progress("render")
+            await asyncio.to_thread(self.write_translation_to_doc, src_text, translation, doc_path)
+        finally:
             # Cleanup temporary files
-            os.unlink(video_path)
-            os.unlink(audio_path)
-            return warnings, None
-        
-        translation = await self.translate_client.translate_text(src_text, dest_language)
-        
-        self.write_translation_to_doc(src_text, translation, doc_path)
-        
-        # Cleanup temporary files
-        os.unlink(video_path)
-        os.unlink(audio_path)
-        
+            for path in (video_path, audio_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
         return warnings, doc_path
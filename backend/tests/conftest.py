@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+# Set before any backend module reads its configuration: the local stores and
+# cached results go to a scratch directory, the database is in memory
+_scratch = tempfile.mkdtemp(prefix="workorbit-tests-")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+for name, filename in [
+    ("SEARCH_GENERATION_PATH", "search_generation.sqlite3"),
+    ("JOB_STORE_PATH", "jobs.sqlite3"),
+    ("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3"),
+    ("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3"),
+    ("RESULT_CACHE_DIR", "results"),
+]:
+    os.environ.setdefault(name, os.path.join(_scratch, filename))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.controllers.database import Base
+from backend.models import file, file_type_count, translation_result, user  # noqa: F401
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on a fresh in-memory database with every table created."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
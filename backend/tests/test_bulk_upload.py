@@ -0,0 +1,177 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.controllers import search_controller
+from backend.models.file import File
+from backend.models.file_type_count import FileTypeCount
+from backend.services import elasticsearch_service
+
+
+class FakeVectors(list):
+    def tolist(self):
+        return list(self)
+
+
+class FakeModel:
+    def encode(self, texts, batch_size=None):
+        return [FakeVectors([1.0, 0.0]) for _ in texts]
+
+
+class FakeElasticsearch:
+    """Indexes bulk requests in memory; `fail_bulk` lists the (0-based) calls that raise."""
+
+    def __init__(self, fail_bulk=(), fail_refresh=False):
+        self.fail_bulk = set(fail_bulk)
+        self.fail_refresh = fail_refresh
+        self.bulk_calls = 0
+        self.documents = []
+        self.deleted_sql_ids = []
+        self.indices = self
+
+    def bulk(self, index, operations):
+        call, self.bulk_calls = self.bulk_calls, self.bulk_calls + 1
+        if call in self.fail_bulk:
+            raise ConnectionError("bulk request timed out")
+        documents = operations[1::2]
+        self.documents += documents
+        return {"items": [{"index": {"result": "created"}} for _ in documents]}
+
+    def refresh(self, index):
+        if self.fail_refresh:
+            raise ConnectionError("refresh timed out")
+
+    def delete_by_query(self, index, query, conflicts, refresh):
+        sql_ids = set(query["terms"]["sql_id"])
+        self.deleted_sql_ids += sorted(sql_ids)
+        self.documents = [document for document in self.documents if document["sql_id"] not in sql_ids]
+        return {"deleted": len(sql_ids)}
+
+
+class FakeGCS:
+    def __init__(self):
+        self.objects = set()
+
+    def upload_file(self, path, gcs_path):
+        self.objects.add(gcs_path)
+        return f"https://storage.example/{gcs_path}"
+
+    def delete_gcs_file(self, url):
+        self.objects.discard(url.rsplit("storage.example/", 1)[1])
+        return True
+
+
+@pytest.fixture
+def service(monkeypatch):
+    def make(**kwargs):
+        es = elasticsearch_service.ElasticSearchService.__new__(elasticsearch_service.ElasticSearchService)
+        es.es = FakeElasticsearch(**kwargs)
+        es.bootstrapped = True
+        es.embedding_cache = None
+        return es
+
+    monkeypatch.setattr(elasticsearch_service, "get_embedding_model", lambda: FakeModel())
+    monkeypatch.setattr(elasticsearch_service, "extract_attachment", lambda path: {"content": f"text of {path}"})
+    return make
+
+
+def items(count):
+    return [
+        {"file_path": f"/tmp/f{i}.txt", "file_type": "txt", "url": f"gs://f{i}", "sql_id": i}
+        for i in range(1, count + 1)
+    ]
+
+
+def test_failed_batch_only_fails_its_items(service):
+    es = service(fail_bulk={1})
+    errors = es.bulk_ingest(items(3), max_docs=1)
+
+    assert errors[0] is None and errors[2] is None
+    assert "timed out" in errors[1]
+    assert [document["sql_id"] for document in es.es.documents] == [1, 3]
+
+
+def test_failed_refresh_fails_no_item(service):
+    es = service(fail_refresh=True)
+    assert es.bulk_ingest(items(2)) == [None, None]
+
+
+def test_unreadable_file_only_fails_itself(service, monkeypatch):
+    def extract(path):
+        if path.endswith("f2.txt"):
+            raise ValueError("not a document")
+        return {"content": "text"}
+
+    monkeypatch.setattr(elasticsearch_service, "extract_attachment", extract)
+    es = service()
+    errors = es.bulk_ingest(items(3))
+
+    assert errors[0] is None and errors[2] is None
+    assert "not a document" in errors[1]
+
+
+def post_bulk(es, session_factory, count):
+    def get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(search_controller.search_router)
+    app.dependency_overrides[search_controller.get_db] = get_db
+    app.dependency_overrides[search_controller.get_elasticsearch_service] = lambda: es
+    files = [("files", (f"doc{i}.pdf", b"%PDF-1.4", "application/pdf")) for i in range(count)]
+    response = TestClient(app).post("/search/upload/bulk", files=files)
+    assert response.status_code == 200, response.text
+    return [status["status"] for status in response.json()["files"]]
+
+
+@pytest.fixture
+def gcs(monkeypatch):
+    gcs = FakeGCS()
+    monkeypatch.setattr(search_controller, "get_gcs_service", lambda: gcs)
+    monkeypatch.setattr(search_controller, "invalidate_search_cache", lambda: None)
+    return gcs
+
+
+def pdf_count(db):
+    row = db.query(FileTypeCount).filter(FileTypeCount.file_type == "pdf").first()
+    return row.count if row else 0
+
+
+def test_upload_bulk_keeps_only_indexed_files(service, session_factory, gcs):
+    es = service(fail_bulk={1})
+    bulk_ingest = es.bulk_ingest
+    es.bulk_ingest = lambda items: bulk_ingest(items, max_docs=1)
+
+    assert post_bulk(es, session_factory, 3) == ["ok", "failed", "ok"]
+
+    db = session_factory()
+    kept = sorted(file.filename for file in db.query(File).all())
+    assert kept == ["doc0.pdf", "doc2.pdf"]
+    assert pdf_count(db) == 2
+    assert sorted(document["file_name"] for document in es.es.documents) == kept
+    assert gcs.objects == {"pdf/doc0.pdf", "pdf/doc2.pdf"}
+    db.close()
+
+
+def test_upload_bulk_failure_after_a_flush_leaves_no_documents(service, session_factory, gcs):
+    es = service()
+    bulk_ingest = es.bulk_ingest
+
+    def index_then_fail(items):
+        bulk_ingest(items)
+        raise ConnectionError("connection reset")
+
+    es.bulk_ingest = index_then_fail
+
+    assert post_bulk(es, session_factory, 2) == ["failed", "failed"]
+
+    db = session_factory()
+    assert db.query(File).count() == 0
+    assert pdf_count(db) == 0
+    assert es.es.documents == []
+    assert gcs.objects == set()
+    db.close()
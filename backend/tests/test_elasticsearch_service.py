@@ -0,0 +1,116 @@
+import pytest
+
+from backend.services import elasticsearch_service
+from backend.services.elasticsearch_service import (
+    INDEX_MAPPING_VERSION,
+    BadRequestError,
+    ElasticSearchService,
+    IndexMappingConflict,
+    rrf_fuse,
+)
+
+
+class ApiMeta:
+    status = 400
+
+
+class FakeIndices:
+    def __init__(self, version, conflict=False):
+        self.version = version
+        self.conflict = conflict
+        self.updates = []
+
+    def exists(self, index):
+        return True
+
+    def get_mapping(self, index):
+        return {index: {"mappings": {"_meta": {"version": self.version}}}}
+
+    def put_mapping(self, index, properties, meta):
+        if self.conflict:
+            raise BadRequestError(
+                "illegal_argument_exception",
+                meta=ApiMeta(),
+                body={"error": {"reason": "mapper [embedding] cannot be changed from type [dense_vector]"}},
+            )
+        self.updates.append((properties, meta))
+
+
+def make_service(indices):
+    es = ElasticSearchService.__new__(ElasticSearchService)
+    es.es = type("FakeElasticsearch", (), {"indices": indices})()
+    es.bootstrapped = False
+    es.embedding_cache = None
+    return es
+
+
+def test_new_mapping_version_is_applied():
+    indices = FakeIndices(version=INDEX_MAPPING_VERSION - 1)
+    es = make_service(indices)
+
+    assert es.bootstrap() == {"index": "updated"}
+    assert es.bootstrapped
+    assert indices.updates[0][1] == {"version": INDEX_MAPPING_VERSION}
+
+
+def test_mapping_conflict_fails_the_bootstrap():
+    es = make_service(FakeIndices(version=1, conflict=True))
+
+    with pytest.raises(IndexMappingConflict, match="reindex"):
+        es.bootstrap()
+    assert not es.bootstrapped
+
+
+def test_ingest_is_refused_while_the_mapping_conflicts(monkeypatch):
+    es = make_service(FakeIndices(version=1, conflict=True))
+    uploads = []
+    monkeypatch.setattr(ElasticSearchService, "upload_file", lambda self, path, file_type: uploads.append(path))
+    monkeypatch.setattr(elasticsearch_service, "extract_attachment", lambda path: {"content": "text"})
+
+    with pytest.raises(IndexMappingConflict):
+        es.ingest_document("/tmp/report.pdf", sql_id=1)
+    assert uploads == []
+
+
+def test_ingest_document_does_not_wait_for_a_refresh(monkeypatch, tmp_path):
+    indexed = []
+    es = make_service(FakeIndices(version=INDEX_MAPPING_VERSION))
+    es.es.index = lambda **args: indexed.append(args) or {"result": "created"}
+    es.get_embeddings = lambda texts: [[0.0] for _ in texts]
+    monkeypatch.setattr(ElasticSearchService, "upload_file", lambda self, path, file_type: "gs://report.pdf")
+    monkeypatch.setattr(elasticsearch_service, "extract_attachment", lambda path: {"content": "quarterly report"})
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF-1.4")
+
+    assert es.ingest_document(str(path), sql_id=7) == "gs://report.pdf"
+    assert "refresh" not in indexed[0]
+    assert indexed[0]["document"]["sql_id"] == 7
+
+
+def test_rrf_fuse_keeps_hits_without_sql_id_apart():
+    # Translated documents are indexed with a null sql_id
+    translated = [{"_id": f"translated-{i}", "_source": {"sql_id": None}} for i in range(3)]
+    fused = rrf_fuse([translated, translated[::-1]])
+
+    assert sorted(hit["_id"] for hit in fused) == ["translated-0", "translated-1", "translated-2"]
+
+
+def hit(sql_id):
+    return {"_id": f"passage-{sql_id}", "_source": {"sql_id": sql_id}}
+
+
+def test_rrf_fuse_ranks_hits_found_by_both_lists_first():
+    keyword = [hit(1), hit(2), hit(3)]
+    semantic = [hit(4), hit(3), hit(2)]
+    fused = rrf_fuse([keyword, semantic], rank_constant=60)
+
+    assert [h["_source"]["sql_id"] for h in fused] == [2, 3, 1, 4]
+    assert fused[0]["_rrf_score"] == pytest.approx(1 / 62 + 1 / 63)
+
+
+def test_rrf_fuse_counts_only_the_best_passage_of_a_document():
+    # Several passages of document 1 in the semantic list
+    fused = rrf_fuse([[hit(1), hit(1), hit(2)], [hit(2)]], rank_constant=1)
+
+    assert [h["_source"]["sql_id"] for h in fused] == [2, 1]
+    assert fused[1]["_rrf_score"] == pytest.approx(1 / 2)
@@ -0,0 +1,164 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.services.job_service import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    RUNNING,
+    JobService,
+    JobStore,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+@pytest.fixture
+def upload(tmp_path):
+    def make(name):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-1.4")
+        return str(path)
+    return make
+
+
+async def wait_for_status(service, job_id, status):
+    for _ in range(200):
+        if service.get(job_id)["status"] == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {service.get(job_id)['status']}, expected {status}")
+
+
+def make_service(store):
+    """A one-worker service whose "block" jobs wait until `release` is set."""
+    service = JobService(store=store, workers=1)
+    service.release = asyncio.Event()
+    service.started = []
+
+    async def block(params, progress):
+        service.started.append(params["input_path"])
+        await service.release.wait()
+        return {"ok": True}
+
+    service.register("block", block)
+    return service
+
+
+def test_cancelling_a_queued_job_removes_its_upload(store, upload):
+    async def scenario():
+        service = make_service(store)
+        first = await service.submit("block", {"input_path": upload("first.pdf")})
+        await wait_for_status(service, first["id"], RUNNING)
+        queued = await service.submit("block", {"input_path": upload("queued.pdf")})
+
+        assert service.cancel(queued["id"])["status"] == CANCELLED
+        assert not os.path.exists(queued["params"]["input_path"])
+
+        service.release.set()
+        await wait_for_status(service, first["id"], COMPLETED)
+        await service.queue.join()
+        await service.stop()
+        return service.started, first
+
+    started, first = asyncio.run(scenario())
+    assert started == [first["params"]["input_path"]]
+
+
+def test_job_cancelled_through_another_worker_removes_its_upload(store, upload):
+    async def scenario():
+        service = make_service(store)
+        first = await service.submit("block", {"input_path": upload("first.pdf")})
+        await wait_for_status(service, first["id"], RUNNING)
+        queued = await service.submit("block", {"input_path": upload("queued.pdf")})
+        # Another uvicorn worker only sees the shared store
+        store.update(queued["id"], status=CANCELLED)
+
+        service.release.set()
+        await service.queue.join()
+        await service.stop()
+        return queued
+
+    queued = asyncio.run(scenario())
+    assert not os.path.exists(queued["params"]["input_path"])
+    assert store.get(queued["id"])["status"] == CANCELLED
+
+
+def test_cancelling_a_running_job_cancels_its_task(store, upload):
+    async def scenario():
+        service = make_service(store)
+        job = await service.submit("block", {"input_path": upload("running.pdf")})
+        await wait_for_status(service, job["id"], RUNNING)
+
+        service.cancel(job["id"])
+        await service.queue.join()
+        await service.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert store.get(job["id"])["status"] == CANCELLED
+
+
+def test_restart_fails_interrupted_jobs_and_removes_their_upload(store, upload):
+    job = store.create("block", {"input_path": upload("interrupted.pdf")})
+    # Owned by a process that no longer exists
+    store.update(job["id"], status=RUNNING, owner_pid=2 ** 22 + 1)
+
+    async def scenario():
+        service = make_service(store)
+        await service.start()
+        await service.stop()
+
+    asyncio.run(scenario())
+    assert store.get(job["id"])["status"] == FAILED
+    assert not os.path.exists(job["params"]["input_path"])
+
+
+def test_failed_document_job_removes_its_upload(upload, monkeypatch):
+    from backend.controllers import job_controller
+
+    async def cache_miss(db, key):
+        return None
+
+    async def failing_translation(*args, **kwargs):
+        return {"error": ["translation failed"]}
+
+    monkeypatch.setattr(job_controller, "find_cached_result_async", cache_miss)
+    monkeypatch.setattr(job_controller.pdf_to_pdf_translator_service, "process_file", failing_translation)
+    params = {"input_path": upload("document.pdf"), "dest_file": "pdf", "src_language": "en", "dest_language": "fr"}
+
+    with pytest.raises(Exception, match="translation failed"):
+        asyncio.run(job_controller.run_document_job(params, lambda *args: None))
+    assert not os.path.exists(params["input_path"])
+
+
+def test_cancel_endpoint_removes_a_queued_upload(store, upload, monkeypatch):
+    from fastapi import HTTPException
+
+    from backend.controllers import job_controller
+
+    async def scenario():
+        service = make_service(store)
+        monkeypatch.setattr(job_controller, "job_service", service)
+        first = await service.submit("block", {"input_path": upload("first.pdf")})
+        await wait_for_status(service, first["id"], RUNNING)
+        queued = await service.submit("block", {"input_path": upload("queued.pdf")})
+
+        cancelled = await job_controller.cancel_job(queued["id"])
+        with pytest.raises(HTTPException) as missing:
+            await job_controller.cancel_job("no-such-job")
+
+        service.release.set()
+        await service.queue.join()
+        await service.stop()
+        return queued, cancelled, missing.value
+
+    queued, cancelled, missing = asyncio.run(scenario())
+    assert cancelled["status"] == CANCELLED
+    assert not os.path.exists(queued["params"]["input_path"])
+    assert missing.status_code == 404
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from backend.config.config import LANGUAGE_DETECTION_MIN_CONFIDENCE
+from backend.services.language_detection_service import LanguageDetectionService
+from backend.services.local_language_detector import LocalLanguageDetector, sample_text
+
+PROFILED = {
+    "en": "The quarterly report shows that revenue grew in every region, and the board will discuss it on Monday.",
+    "es": "El informe trimestral muestra que los ingresos crecieron en todas las regiones y que la junta lo discutirá el lunes.",
+    "de": "Der Quartalsbericht zeigt, dass der Umsatz in allen Regionen gestiegen ist, und der Vorstand wird ihn am Montag besprechen.",
+    "nl": "Het kwartaalrapport laat zien dat de omzet in alle regio's is gegroeid en de raad zal het maandag bespreken.",
+    "vi": "Báo cáo quý cho thấy doanh thu đã tăng ở tất cả các khu vực và hội đồng sẽ thảo luận vào thứ Hai.",
+    "id": "Laporan triwulan menunjukkan bahwa pendapatan tumbuh di semua wilayah dan dewan akan membahasnya pada hari Senin.",
+    "pl": "Raport kwartalny pokazuje, że przychody wzrosły we wszystkich regionach, a zarząd omówi go w poniedziałek.",
+    "pt": "Olá, como você está?",
+}
+
+# Latin-script languages without a profile, or easily mistaken for a profiled one
+NEAR_MISSES = {
+    "fi": "Hyvää päivää, miten voit tänään? Toivottavasti sinulla on mukava päivä.",
+    "ro": "Bună ziua, ce mai faceți? Mă bucur să vă cunosc și sper că aveți o zi frumoasă.",
+    "sv": "Jag är glad att träffa dig och det är en fin dag i dag.",
+    "cs": "Dobrý den, jak se máte? Doufám, že máte krásný den a že se vám daří dobře.",
+    "hu": "Jó napot kívánok, hogy van? Remélem, hogy szép napja van és minden rendben megy.",
+}
+
+
+@pytest.fixture
+def detector():
+    return LocalLanguageDetector()
+
+
+@pytest.mark.parametrize("lang", sorted(PROFILED))
+def test_profiled_languages_are_detected(detector, lang):
+    detected, confidence = detector.detect(PROFILED[lang])
+    assert detected == lang
+    assert confidence >= LANGUAGE_DETECTION_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize("lang", sorted(NEAR_MISSES))
+def test_unprofiled_latin_languages_are_not_trusted(detector, lang):
+    detected, confidence = detector.detect(NEAR_MISSES[lang])
+    assert confidence < LANGUAGE_DETECTION_MIN_CONFIDENCE, (detected, confidence)
+
+
+def test_scripts_identify_their_language(detector):
+    assert detector.detect("Квартальный отчёт показывает, что выручка выросла.")[0] == "ru"
+    assert detector.detect("四半期報告書によると、すべての地域で収益が増加しました。")[0] == "ja"
+    assert detector.detect("يظهر التقرير الفصلي أن الإيرادات نمت في جميع المناطق.") == ("ar", 1.0)
+
+
+def test_persian_is_not_taken_for_arabic(detector):
+    lang, confidence = detector.detect("گزارش فصلی نشان می‌دهد که درآمد در همه مناطق افزایش یافته است.")
+    assert confidence < LANGUAGE_DETECTION_MIN_CONFIDENCE
+
+
+def test_short_text_is_not_guessed(detector):
+    assert detector.detect("OK, thanks") == (None, 0.0)
+
+
+def test_sample_text_spreads_windows_over_the_text():
+    text = "".join(chr(ord("a") + i % 26) * 100 for i in range(40))
+    sample = sample_text(text, 400)
+    assert len(sample) < 420
+    assert sample[0] == "a" and sample[-1] == text[-1]
+    assert sample_text("short", 400) == "short"
+
+
+class FakeTranslator:
+    def __init__(self, lang):
+        self.lang = lang
+        self.calls = 0
+
+    async def detect(self, text):
+        self.calls += 1
+        return type("Detected", (), {"lang": self.lang})()
+
+
+def detect_with_fallback(text, remote_lang):
+    service = LanguageDetectionService()
+    service.translator = FakeTranslator(remote_lang)
+    return asyncio.run(service.detect_language(text)), service.translator.calls
+
+
+def test_near_miss_falls_back_to_remote_detection():
+    assert detect_with_fallback(NEAR_MISSES["fi"], "fi") == ("fi", 1)
+    assert detect_with_fallback(NEAR_MISSES["ro"], "ro") == ("ro", 1)
+
+
+def test_confident_local_answer_skips_remote_detection():
+    assert detect_with_fallback(PROFILED["de"], "xx") == ("de", 0)
@@ -0,0 +1,24 @@
+import pytest
+
+from backend.services.pagination import decode_cursor, encode_cursor, fingerprint
+
+
+def test_cursor_round_trip():
+    state = {"key": "abc", "after": [4.5, 2, 9223372036854775807], "total": 5, "pit": "pit-0"}
+    cursor = encode_cursor(state)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == state
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", encode_cursor([1, 2])[:-1], "W10", "bm90IGpzb24"])
+def test_foreign_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_fingerprint_depends_on_every_part():
+    base = fingerprint("report", "keyword", None, 10)
+    assert base == fingerprint("report", "keyword", None, 10)
+    assert base != fingerprint("report", "semantic", None, 10)
+    assert base != fingerprint("report", "keyword", "pdf", 10)
+    assert len(base) == 16
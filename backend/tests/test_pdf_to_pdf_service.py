@@ -0,0 +1,22 @@
+import pytest
+
+from backend.services.pdf_to_pdf_service import shard_pages
+
+
+@pytest.mark.parametrize("page_count, workers, min_pages", [(1, 4, 8), (10, 4, 8), (100, 4, 8), (101, 3, 1), (7, 0, 1)])
+def test_shards_cover_every_page_once(page_count, workers, min_pages):
+    shards = shard_pages(page_count, workers, min_pages)
+    assert [page for start, stop in shards for page in range(start, stop)] == list(range(page_count))
+    assert len(shards) <= max(1, workers)
+
+
+def test_small_documents_stay_in_one_shard():
+    assert shard_pages(10, workers=4, min_pages=16) == [(0, 10)]
+
+
+def test_large_documents_are_split_evenly():
+    assert shard_pages(100, workers=4, min_pages=8) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+
+
+def test_no_pages_no_shards():
+    assert shard_pages(0, workers=4, min_pages=8) == []
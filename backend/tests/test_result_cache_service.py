@@ -0,0 +1,48 @@
+import hashlib
+import os
+
+import pytest
+
+from backend.services import result_cache_service
+
+
+class FakeGCS:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def download_file(self, url, local_file_path):
+        if url not in self.objects:
+            return False
+        with open(local_file_path, "wb") as f:
+            f.write(self.objects[url])
+        return True
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache_service, "RESULT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_restore_artifact_downloads_the_stored_file(cache_dir, monkeypatch):
+    gcs = FakeGCS({"https://storage.example/translated.pdf": b"%PDF-1.4 translated"})
+    monkeypatch.setattr(result_cache_service, "get_gcs_service", lambda: gcs)
+    artifact_path = str(cache_dir / "abc_en-fr.pdf")
+
+    assert result_cache_service.restore_artifact("https://storage.example/translated.pdf", artifact_path)
+    with open(artifact_path, "rb") as f:
+        assert f.read() == b"%PDF-1.4 translated"
+    assert os.listdir(cache_dir) == ["abc_en-fr.pdf"]
+
+
+def test_restore_artifact_of_a_missing_object_leaves_nothing_behind(cache_dir, monkeypatch):
+    monkeypatch.setattr(result_cache_service, "get_gcs_service", lambda: FakeGCS({}))
+
+    assert not result_cache_service.restore_artifact("https://storage.example/gone.pdf", str(cache_dir / "gone.pdf"))
+    assert os.listdir(cache_dir) == []
+
+
+def test_hash_file_matches_hashing_the_content(tmp_path):
+    path = tmp_path / "document.pdf"
+    path.write_bytes(b"x" * 3000)
+    assert result_cache_service.hash_file(str(path), chunk_size=1024) == hashlib.sha256(b"x" * 3000).hexdigest()
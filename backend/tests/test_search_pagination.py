@@ -0,0 +1,169 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.controllers import search_controller
+from backend.models.file import File
+from backend.services import elasticsearch_service
+from backend.services.pagination import decode_cursor, encode_cursor
+from backend.services.search_cache_service import GenerationStore, SearchCache
+
+SQL_IDS = [4, 2, 5, 1, 3]
+
+
+class FakeElasticsearch:
+    """Returns SQL_IDS in rank order and checks sorts and cursors the way ES does."""
+
+    def __init__(self):
+        self.searches = []
+        self.opened = []
+        self.closed = []
+
+    def open_point_in_time(self, index, keep_alive):
+        pit_id = f"pit-{len(self.opened)}"
+        self.opened.append(pit_id)
+        return {"id": pit_id}
+
+    def close_point_in_time(self, id):
+        self.closed.append(id)
+
+    def search(self, **args):
+        self.searches.append(args)
+        assert ("index" in args) != ("pit" in args)
+        sort = args["sort"]
+        if "pit" in args:
+            assert args["pit"]["id"] in self.opened and args["pit"]["id"] not in self.closed
+        else:
+            assert {"_shard_doc": "asc"} not in sort
+
+        hits = []
+        for position, sql_id in enumerate(SQL_IDS):
+            values = [float(len(SQL_IDS) - position), sql_id, position][:len(sort)]
+            hits.append({"_id": f"doc-{sql_id}", "_source": {"sql_id": sql_id}, "sort": values})
+
+        after = args.get("search_after")
+        if after:
+            assert len(after) == len(sort), "search_after must match the sort"
+            position_of = lambda values: (-values[0], *values[1:])
+            hits = [hit for hit in hits if position_of(hit["sort"]) > position_of(after)]
+
+        response = {"hits": {"total": {"value": len(SQL_IDS)}, "hits": hits[:args["size"]]}}
+        if "pit" in args:
+            response["pit_id"] = args["pit"]["id"]
+        return response
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    db = session_factory()
+    for sql_id in sorted(SQL_IDS):
+        db.add(File(id=sql_id, user_id=1, filename=f"f{sql_id}.pdf", file_type="pdf", file_path="", source="upload"))
+    db.commit()
+    db.close()
+
+    cache = SearchCache(generations=GenerationStore(":memory:"))
+    monkeypatch.setattr(search_controller, "search_cache", cache)
+
+    es = elasticsearch_service.ElasticSearchService.__new__(elasticsearch_service.ElasticSearchService)
+    es.es = FakeElasticsearch()
+    es.bootstrapped = True
+    es.embedding_cache = None
+
+    def get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(search_controller.search_router)
+    app.dependency_overrides[search_controller.get_db] = get_db
+    app.dependency_overrides[search_controller.get_elasticsearch_service] = lambda: es
+    client = TestClient(app)
+    client.es = es.es
+    return client
+
+
+def search(client, cursor=None):
+    params = {"query": "report", "mode": "keyword", "page_size": 2}
+    if cursor:
+        params["cursor"] = cursor
+    response = client.post("/search/", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_first_page_opens_no_point_in_time(client):
+    response = search(client)
+
+    assert [file["id"] for file in response.json()] == [4, 2]
+    assert response.headers["X-Total-Count"] == "5"
+    assert client.es.opened == []
+    assert "pit" not in decode_cursor(response.headers["X-Next-Cursor"])
+
+
+def test_follow_cursor_to_the_last_page(client):
+    first = search(client)
+    second = search(client, first.headers["X-Next-Cursor"])
+
+    assert [file["id"] for file in second.json()] == [5, 1]
+    assert second.headers["X-Total-Count"] == "5"
+    assert client.es.opened == ["pit-0"]
+    page_two = client.es.searches[-1]
+    assert page_two["sort"][-1] == {"_shard_doc": "asc"}
+    assert page_two["search_after"] == [4.0, 2, elasticsearch_service.LAST_SHARD_DOC]
+
+    third = search(client, second.headers["X-Next-Cursor"])
+    assert [file["id"] for file in third.json()] == [3]
+    assert "X-Next-Cursor" not in third.headers
+    assert client.es.searches[-1]["pit"]["id"] == "pit-0"
+    assert client.es.opened == ["pit-0"]
+    assert client.es.closed == ["pit-0"]
+
+
+def test_cached_first_page_makes_no_elasticsearch_call(client):
+    first = search(client)
+    searches = len(client.es.searches)
+
+    again = search(client)
+    assert again.headers["X-Cache"] == "HIT"
+    assert again.json() == first.json()
+    assert again.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert len(client.es.searches) == searches
+    assert client.es.opened == []
+
+
+def test_pages_read_from_a_point_in_time_are_not_cached(client):
+    cursor = search(client).headers["X-Next-Cursor"]
+    search(client, cursor)
+    again = search(client, cursor)
+
+    assert again.headers["X-Cache"] == "MISS"
+    assert client.es.opened == ["pit-0", "pit-1"]
+
+
+def test_cursor_from_another_search_is_rejected(client):
+    cursor = encode_cursor({"key": "other", "after": [1.0, 1]})
+    response = client.post("/search/", params={"query": "report", "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_cache_hits_report_their_time(client):
+    search(client)
+    again = search(client)
+    assert again.headers["X-Cache"] == "HIT"
+    assert float(again.headers["X-Search-Time-Ms"]) >= 0
+
+
+def test_no_cache_header_skips_the_cache(client):
+    search(client)
+    searches = len(client.es.searches)
+
+    response = client.post(
+        "/search/",
+        params={"query": "report", "mode": "keyword", "page_size": 2},
+        headers={"Cache-Control": "no-cache"},
+    )
+    assert response.headers["X-Cache"] == "MISS"
+    assert len(client.es.searches) == searches + 1
@@ -0,0 +1,69 @@
+import pytest
+
+from backend.services.text_chunker import iter_chunks, iter_passages, split_padding
+
+TEXT = (
+    "Quarterly results.\n\nRevenue grew in every region. Costs fell slightly; margins improved!\n\n"
+    "The board will discuss the report on Monday, and the outlook after that. "
+) * 5
+CJK = "四半期報告書によると、すべての地域で収益が増加しました。" * 10
+
+
+@pytest.mark.parametrize("max_chars", [1, 7, 40, 100, 10_000])
+def test_chunks_rebuild_the_text_and_fit(max_chars):
+    chunks = list(iter_chunks(TEXT, max_chars))
+    assert "".join(chunks) == TEXT
+    assert all(0 < len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_chunks_prefer_paragraph_then_sentence_then_word_breaks():
+    paragraph = "First paragraph here.\n\nSecond one. It goes on and on"
+    assert next(iter_chunks(paragraph, 40)) == "First paragraph here.\n\n"
+    sentence = "One sentence here. Another one goes on and on"
+    assert next(iter_chunks(sentence, 30)) == "One sentence here. "
+    words = "no sentence breaks in this text at all"
+    assert next(iter_chunks(words, 20)) == "no sentence breaks "
+    assert next(iter_chunks("x" * 50, 20)) == "x" * 20
+
+
+def test_chunks_reject_a_non_positive_size():
+    with pytest.raises(ValueError):
+        list(iter_chunks(TEXT, 0))
+
+
+@pytest.mark.parametrize("text", [TEXT, CJK], ids=["latin", "cjk"])
+def test_passage_offsets_point_into_the_text(text):
+    passages = list(iter_passages(text, 120, 30))
+    assert passages
+    for offset, passage in passages:
+        assert text[offset:offset + len(passage)] == passage
+        assert len(passage) <= 120
+
+    # Nothing is lost between passages
+    covered = set()
+    for offset, passage in passages:
+        covered.update(range(offset, offset + len(passage)))
+    assert all(i in covered for i, char in enumerate(text) if not char.isspace())
+
+
+def test_latin_overlap_starts_at_a_word():
+    passages = list(iter_passages(TEXT, 120, 30))
+    for (previous_offset, previous), (offset, passage) in zip(passages, passages[1:]):
+        assert offset < previous_offset + len(previous)
+        assert offset == 0 or TEXT[offset - 1].isspace()
+
+
+def test_cjk_overlaps_by_characters():
+    passages = list(iter_passages(CJK, 120, 30))
+    for (previous_offset, previous), (offset, _) in zip(passages, passages[1:]):
+        assert previous_offset + len(previous) - offset == 30
+
+
+def test_passages_reject_an_overlap_as_large_as_the_size():
+    with pytest.raises(ValueError):
+        list(iter_passages(TEXT, 30, 30))
+
+
+def test_split_padding():
+    assert split_padding("  text \n") == ("  ", "text", " \n")
+    assert split_padding(" \n ") == (" \n ", "", "")
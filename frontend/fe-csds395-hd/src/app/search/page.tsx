@@ -73,6 +73,10 @@ const SearchPage: NextPage = () => {
   const [confirmDeleteId, setConfirmDeleteId] = useState<number | null>(null);
   const [isConfirmModalOpen, setIsConfirmModalOpen] = useState(false);
   const [isFullResultsModalOpen, setIsFullResultsModalOpen] = useState(false);
+  // The query and file type of the results shown; a cursor only continues the search it came from
+  const [activeSearch, setActiveSearch] = useState({ query: '', fileType: '' });
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState<boolean>(false);
 
   const handleViewAll = () => {
     setIsFullResultsModalOpen(true);
@@ -122,62 +126,69 @@ const SearchPage: NextPage = () => {
     fetchCategoryCounts();
   }, []);
 
-  const performSearch = async () => {
-    setIsLoading(true);
-    setError(null);    
-
-    try {
-      let data: SearchResultItem[] = [];
-
-      if (query == '') {
-        const params = new URLSearchParams();
-
-        if (selectedFileType) {
-          params.append('file_type', selectedFileType);
-        }
+  // Both endpoints return one page; the X-Next-Cursor header, sent back as `cursor`, fetches the next one
+  const fetchPage = async (searchQuery: string, fileType: string, cursor: string | null) => {
+    const params = new URLSearchParams();
+    if (searchQuery != '') {
+      params.append('query', searchQuery);
+    }
+    if (fileType) {
+      params.append('file_type', fileType);
+    }
+    if (cursor) {
+      params.append('cursor', cursor);
+    }
 
-        const response = await fetch(`http://localhost:8000/recent_files?${params.toString()}`, {
-          method: 'GET',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-        });
-        if (!response.ok) {
-          throw new Error('Failed to fetch files.');
-        }
-        data = await response.json();
+    let response: Response;
+    if (searchQuery == '') {
+      response = await fetch(`http://localhost:8000/recent_files?${params.toString()}`, {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      });
+      if (!response.ok) {
+        throw new Error('Failed to fetch files.');
       }
-      else {
-        const params = new URLSearchParams({ 'query': query });
-        if (selectedFileType) {
-          params.append('file_type', selectedFileType);
-        }
-        const body = {
-          query: query,
-          ...(selectedFileType && { file_type: selectedFileType }),
-        };
+    }
+    else {
+      const body = {
+        query: searchQuery,
+        ...(fileType && { file_type: fileType }),
+      };
 
-        const response = await fetch(`http://localhost:8000/search?${params.toString()}`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify(body),
-        });
-        if (!response.ok) {
-          throw new Error('Failed to search files.');
-        }
-        data = await response.json();
+      response = await fetch(`http://localhost:8000/search?${params.toString()}`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(body),
+      });
+      if (!response.ok) {
+        throw new Error('Failed to search files.');
       }
+    }
 
-      const transformedResults: TransformedResult[] = data.map(item => ({
-        id: item.id,
-        fileName: item.filename,
-        modified: item.uploaded_at,
-        category: item.file_type,
-        file_path: item.file_path,
-      }));
-      setSearchResults(transformedResults);
+    const data: SearchResultItem[] = await response.json();
+    const results: TransformedResult[] = data.map(item => ({
+      id: item.id,
+      fileName: item.filename,
+      modified: item.uploaded_at,
+      category: item.file_type,
+      file_path: item.file_path,
+    }));
+    return { results, next: response.headers.get('X-Next-Cursor') };
+  };
+
+  const performSearch = async () => {
+    setIsLoading(true);
+    setError(null);    
+
+    try {
+      const page = await fetchPage(query, selectedFileType, null);
+      setActiveSearch({ query: query, fileType: selectedFileType });
+      setSearchResults(page.results);
+      setNextCursor(page.next);
     } catch (error) {
       console.error('Error searching:', error);
       setError('An error occurred while searching. Please try again.');
@@ -186,6 +197,21 @@ const SearchPage: NextPage = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(activeSearch.query, activeSearch.fileType, nextCursor);
+      setSearchResults(prev => [...prev, ...page.results]);
+      setNextCursor(page.next);
+    } catch (error) {
+      console.error('Error loading more results:', error);
+      setError('An error occurred while loading more results. Please try again.');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
     setHasSearched(true);
@@ -267,6 +293,9 @@ const SearchPage: NextPage = () => {
           onClose={() => setIsFullResultsModalOpen(false)}
           results={searchResults}
           onDelete={askDelete}
+          hasMore={nextCursor !== null}
+          isLoadingMore={isLoadingMore}
+          onLoadMore={loadMore}
         />
       )}
 
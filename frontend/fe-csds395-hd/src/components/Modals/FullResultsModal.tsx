@@ -16,9 +16,20 @@ interface FullResultsModalProps {
   onClose: () => void;
   results: TransformedResult[];
   onDelete: (id: number) => void;
+  hasMore?: boolean;
+  isLoadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
-const FullResultsModal: React.FC<FullResultsModalProps> = ({ isOpen, onClose, results, onDelete }) => {
+const FullResultsModal: React.FC<FullResultsModalProps> = ({
+  isOpen,
+  onClose,
+  results,
+  onDelete,
+  hasMore = false,
+  isLoadingMore = false,
+  onLoadMore,
+}) => {
   if (!isOpen) return null;
 
   return (
@@ -42,6 +53,17 @@ const FullResultsModal: React.FC<FullResultsModalProps> = ({ isOpen, onClose, re
             />
           ))}
         </div>
+        {hasMore && onLoadMore && (
+          <div className="flex justify-center mt-4">
+            <button
+              onClick={onLoadMore}
+              disabled={isLoadingMore}
+              className="px-4 py-2 bg-blue-500 text-white rounded hover:bg-[#002a45] disabled:opacity-50"
+            >
+              {isLoadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );